@@ -0,0 +1,337 @@
+import os
+import socket
+import subprocess
+import threading
+from collections import deque
+
+ADB_SERVER_HOST = "127.0.0.1"
+ADB_SERVER_PORT_ENV = "ANDROID_ADB_SERVER_PORT"
+ADB_DEFAULT_PORT = 5037
+_SHELL_SAFE = set("abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789_-+=./:,@%")
+_SHELL_V2_STDOUT = 1
+_SHELL_V2_STDERR = 2
+_SHELL_V2_EXIT = 3
+_SHELL_RC_MARKER = b"__ADB_RC__:"
+
+
+class AdbError(Exception):
+    pass
+
+
+class AdbStreamError(AdbError):
+    pass
+
+
+def _server_port() -> int:
+    raw = os.environ.get(ADB_SERVER_PORT_ENV, "")
+    try:
+        port = int(raw)
+    except ValueError:
+        return ADB_DEFAULT_PORT
+    if 0 < port < 65536:
+        return port
+    return ADB_DEFAULT_PORT
+
+
+def _shell_quote(arg: str) -> str:
+    if arg and all(ch in _SHELL_SAFE for ch in arg):
+        return arg
+    return "'" + arg.replace("'", "'\\''") + "'"
+
+
+def _recv_exact(sock: socket.socket, size: int) -> bytes:
+    buf = bytearray()
+    while len(buf) < size:
+        chunk = sock.recv(size - len(buf))
+        if not chunk:
+            raise AdbStreamError("connection closed by adb server")
+        buf.extend(chunk)
+    return bytes(buf)
+
+
+def parse_devices(text: str) -> list[tuple[str, str]]:
+    result: list[tuple[str, str]] = []
+    for line in text.splitlines():
+        if "\t" not in line:
+            continue
+        serial, state = line.split("\t", 1)
+        result.append((serial.strip(), state.strip()))
+    return result
+
+
+def _recv_all(sock: socket.socket) -> bytes:
+    chunks: list[bytes] = []
+    while True:
+        chunk = sock.recv(65536)
+        if not chunk:
+            break
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+
+def _read_shell_v2(sock: socket.socket) -> tuple[int, bytes, bytes]:
+    out = bytearray()
+    err = bytearray()
+    while True:
+        header = _recv_exact(sock, 5)
+        kind = header[0]
+        length = int.from_bytes(header[1:], "little")
+        data = _recv_exact(sock, length) if length else b""
+        if kind == _SHELL_V2_STDOUT:
+            out.extend(data)
+        elif kind == _SHELL_V2_STDERR:
+            err.extend(data)
+        elif kind == _SHELL_V2_EXIT:
+            return (data[0] if data else 0), bytes(out), bytes(err)
+
+
+def _split_exit_code(data: bytes) -> tuple[int, bytes, bytes]:
+    idx = data.rfind(_SHELL_RC_MARKER)
+    if idx < 0:
+        raise AdbStreamError("shell closed without an exit status")
+    digits = data[idx + len(_SHELL_RC_MARKER) :].strip()
+    try:
+        return int(digits), data[:idx], b""
+    except ValueError:
+        raise AdbStreamError("shell closed without an exit status")
+
+
+class AdbClient:
+    def __init__(
+        self,
+        host: str = ADB_SERVER_HOST,
+        port: int | None = None,
+        pool_size: int = 2,
+        timeout: float = 10.0,
+        shell_timeout: float = 120.0,
+    ) -> None:
+        self.host = host
+        self.port = port if port is not None else _server_port()
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.shell_timeout = shell_timeout
+        self._pool: deque[socket.socket] = deque()
+        self._lock = threading.Lock()
+
+    def _connect(self) -> socket.socket:
+        sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return sock
+
+    @staticmethod
+    def _is_alive(sock: socket.socket) -> bool:
+        try:
+            sock.setblocking(False)
+            try:
+                data = sock.recv(1, socket.MSG_PEEK)
+            except BlockingIOError:
+                return True
+            return bool(data)
+        except OSError:
+            return False
+        finally:
+            try:
+                sock.setblocking(True)
+            except OSError:
+                pass
+
+    def _acquire(self) -> socket.socket:
+        while True:
+            with self._lock:
+                sock = self._pool.popleft() if self._pool else None
+            if sock is None:
+                return self._connect()
+            if self._is_alive(sock):
+                sock.settimeout(self.timeout)
+                return sock
+            sock.close()
+
+    def _refill(self) -> None:
+        while True:
+            with self._lock:
+                if len(self._pool) >= self.pool_size:
+                    return
+            try:
+                sock = self._connect()
+            except OSError:
+                return
+            with self._lock:
+                if len(self._pool) >= self.pool_size:
+                    sock.close()
+                    return
+                self._pool.append(sock)
+
+    def close(self) -> None:
+        with self._lock:
+            pool = list(self._pool)
+            self._pool.clear()
+        for sock in pool:
+            try:
+                sock.close()
+            except OSError:
+                pass
+
+    @staticmethod
+    def _send_request(sock: socket.socket, request: str) -> None:
+        payload = request.encode("utf-8")
+        sock.sendall(f"{len(payload):04x}".encode("ascii") + payload)
+
+    @staticmethod
+    def _read_status(sock: socket.socket) -> None:
+        status = _recv_exact(sock, 4)
+        if status == b"OKAY":
+            return
+        if status == b"FAIL":
+            length = int(_recv_exact(sock, 4), 16)
+            message = _recv_exact(sock, length).decode("utf-8", errors="replace")
+            raise AdbError(message)
+        raise AdbStreamError(f"unexpected adb status {status!r}")
+
+    @staticmethod
+    def _read_length_prefixed(sock: socket.socket) -> bytes:
+        length = int(_recv_exact(sock, 4), 16)
+        return _recv_exact(sock, length)
+
+    def open(self, request: str) -> socket.socket:
+        sock = self._acquire()
+        try:
+            self._send_request(sock, request)
+            self._read_status(sock)
+        except BaseException:
+            sock.close()
+            raise
+        return sock
+
+    def host_request(self, request: str, has_payload: bool = True) -> bytes:
+        sock = self.open(request)
+        try:
+            if not has_payload:
+                return b""
+            return self._read_length_prefixed(sock)
+        finally:
+            sock.close()
+            self._refill()
+
+    def open_transport(self, serial: str | None, service: str) -> socket.socket:
+        target = f"host:transport:{serial}" if serial else "host:transport-any"
+        sock = self.open(target)
+        try:
+            self._send_request(sock, service)
+        except BaseException:
+            sock.close()
+            raise
+        try:
+            self._read_status(sock)
+        except OSError as e:
+            sock.close()
+            raise AdbStreamError(f"no reply to {service.split(':', 1)[0]}: {e}")
+        except BaseException:
+            sock.close()
+            raise
+        return sock
+
+    def version(self) -> int:
+        return int(self.host_request("host:version"), 16)
+
+    def devices(self) -> list[tuple[str, str]]:
+        text = self.host_request("host:devices").decode("utf-8", errors="replace")
+        return parse_devices(text)
+
+    def track_devices(self) -> socket.socket:
+        sock = self.open("host:track-devices")
+        sock.settimeout(None)
+        return sock
+
+    def read_device_update(self, sock: socket.socket) -> list[tuple[str, str]]:
+        text = self._read_length_prefixed(sock).decode("utf-8", errors="replace")
+        return parse_devices(text)
+
+    def kill_server(self) -> None:
+        try:
+            self.host_request("host:kill", has_payload=False)
+        except AdbError:
+            pass
+        self.close()
+
+    def shell(self, args: list[str], serial: str | None = None) -> tuple[int, bytes, bytes]:
+        command = " ".join(_shell_quote(a) for a in args)
+        try:
+            sock = self.open_transport(serial, f"shell,v2,raw:{command}")
+            v2 = True
+        except AdbStreamError:
+            raise
+        except AdbError:
+            sock = self.open_transport(serial, f"shell:{command}; echo {_SHELL_RC_MARKER.decode()}$?")
+            v2 = False
+        try:
+            sock.settimeout(self.shell_timeout)
+            if v2:
+                return _read_shell_v2(sock)
+            return _split_exit_code(_recv_all(sock))
+        except OSError as e:
+            raise AdbStreamError(f"shell interrupted: {e}")
+        finally:
+            sock.close()
+            self._refill()
+
+    def reboot(self, serial: str | None = None, target: str = "") -> None:
+        sock = self.open_transport(serial, f"reboot:{target}")
+        try:
+            _recv_all(sock)
+        except OSError:
+            pass
+        finally:
+            sock.close()
+
+
+_client: AdbClient | None = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> AdbClient:
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = AdbClient()
+        return _client
+
+
+def _split_serial(args: list[str]) -> tuple[str | None, list[str]]:
+    if len(args) >= 2 and args[0] == "-s":
+        return args[1], args[2:]
+    return None, list(args)
+
+
+def _completed(args: list[str], returncode: int, stdout: str = "", stderr: str = "") -> subprocess.CompletedProcess:
+    return subprocess.CompletedProcess(["adb"] + list(args), returncode, stdout, stderr)
+
+
+def run_adb_command(args: list[str]) -> subprocess.CompletedProcess | None:
+    serial, rest = _split_serial(args)
+    if not rest:
+        return None
+    client = get_client()
+    command = rest[0]
+    try:
+        if command == "devices" and len(rest) == 1:
+            lines = ["List of devices attached"]
+            lines += [f"{sn}\t{state}" for sn, state in client.devices()]
+            return _completed(args, 0, "\n".join(lines) + "\n\n")
+        if command == "shell" and len(rest) > 1:
+            code, out, err = client.shell(rest[1:], serial=serial)
+            return _completed(args, code, out.decode("utf-8", errors="replace"), err.decode("utf-8", errors="replace"))
+        if command == "reboot" and len(rest) <= 2:
+            client.reboot(serial=serial, target=rest[1] if len(rest) == 2 else "")
+            return _completed(args, 0)
+        if command == "kill-server" and len(rest) == 1:
+            client.kill_server()
+            return _completed(args, 0)
+    except ConnectionRefusedError:
+        if command == "kill-server":
+            return _completed(args, 0)
+        return None
+    except AdbError as e:
+        return _completed(args, 1, "", f"adb: error: {e}\n")
+    except OSError:
+        return None
+    return None
@@ -1,23 +1,11 @@
-import subprocess
-from pathlib import Path
-
-from .constants import PLATFORM_TOOLS_DIR
-
-
-def _adb_path() -> str:
-    adb = PLATFORM_TOOLS_DIR / "adb.exe"
-    if adb.is_file():
-        return str(adb)
-    return "adb"
+from .utils import run_adb
 
 
 def adb_shell_getprop(name: str) -> str:
-    cmd = [_adb_path(), "shell", "getprop", name]
     try:
-        out = subprocess.check_output(cmd, stderr=subprocess.STDOUT)
+        cp = run_adb(["shell", "getprop", name], capture_output=True)
     except Exception:
         return ""
-    try:
-        return out.decode("utf-8", errors="ignore").strip()
-    except Exception:
+    if cp.returncode != 0:
         return ""
+    return (cp.stdout or "").strip()
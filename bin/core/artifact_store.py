@@ -0,0 +1,158 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+
+from .constants import ARTIFACT_STORE_DIR, ARTIFACT_STORE_ENV, ARTIFACT_STORE_MAX_BYTES
+from .file_lock import locked
+
+_lock = threading.Lock()
+
+
+def store_dir() -> Path:
+    env_path = os.environ.get(ARTIFACT_STORE_ENV, "").strip()
+    return Path(env_path) if env_path else ARTIFACT_STORE_DIR
+
+
+def _manifest_path() -> Path:
+    return store_dir() / "manifest.json"
+
+
+def _store_lock():
+    return locked(store_dir() / "store.lock")
+
+
+def _object_path(sha256: str) -> Path:
+    return store_dir() / "objects" / sha256[:2] / sha256
+
+
+def _load() -> dict[str, dict]:
+    try:
+        data = json.loads(_manifest_path().read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def _save(data: dict[str, dict]) -> None:
+    path = _manifest_path()
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    tmp.write_text(json.dumps(data, indent=2, sort_keys=True), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def _link_or_copy(src: Path, dest: Path) -> None:
+    tmp = dest.with_name(f"{dest.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        os.link(src, tmp)
+    except OSError:
+        shutil.copyfile(src, tmp)
+    os.replace(tmp, dest)
+
+
+def file_sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def lookup(name: str) -> Path | None:
+    try:
+        with _lock, _store_lock():
+            entry = _load().get(name)
+            if not isinstance(entry, dict) or "sha256" not in entry:
+                return None
+            obj = _object_path(entry["sha256"])
+            if obj.stat().st_size != entry.get("size") or file_sha256(obj) != entry["sha256"]:
+                _drop(obj)
+                return None
+            os.utime(obj)
+    except OSError:
+        return None
+    return obj
+
+
+def _drop(obj: Path) -> None:
+    try:
+        obj.unlink()
+    except OSError:
+        pass
+
+
+def materialize(name: str, dest: Path) -> bool:
+    obj = lookup(name)
+    if obj is None:
+        return False
+    try:
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        if dest.is_file() and os.path.samefile(obj, dest):
+            return True
+        _link_or_copy(obj, dest)
+    except OSError:
+        return False
+    return True
+
+
+def add(name: str, src: Path, urls: list[str] | None = None) -> str | None:
+    try:
+        sha256 = file_sha256(src)
+        size = src.stat().st_size
+        obj = _object_path(sha256)
+        obj.parent.mkdir(parents=True, exist_ok=True)
+        with _lock, _store_lock():
+            if not obj.is_file() or obj.stat().st_size != size:
+                _link_or_copy(src, obj)
+            data = _load()
+            data[name] = {"sha256": sha256, "size": size, "urls": list(urls or []), "added": int(time.time())}
+            _save(data)
+    except OSError:
+        return None
+    evict()
+    return sha256
+
+
+def evict(max_bytes: int = ARTIFACT_STORE_MAX_BYTES) -> None:
+    try:
+        with _lock, _store_lock():
+            _evict(max_bytes)
+    except OSError:
+        pass
+
+
+def _evict(max_bytes: int) -> None:
+    objects: list[tuple[float, int, Path]] = []
+    try:
+        for p in (store_dir() / "objects").glob("*/*"):
+            if p.name.endswith(".tmp"):
+                continue
+            try:
+                st = p.stat()
+            except OSError:
+                continue
+            objects.append((st.st_mtime, st.st_size, p))
+    except OSError:
+        return
+    total = sum(size for _, size, _ in objects)
+    removed: set[str] = set()
+    for _, size, p in sorted(objects):
+        if total <= max_bytes:
+            break
+        try:
+            p.unlink()
+        except OSError:
+            continue
+        removed.add(p.name)
+        total -= size
+    if not removed:
+        return
+    data = _load()
+    kept = {k: v for k, v in data.items() if not (isinstance(v, dict) and v.get("sha256") in removed)}
+    try:
+        _save(kept)
+    except OSError:
+        pass
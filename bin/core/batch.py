@@ -0,0 +1,125 @@
+import csv
+import json
+import os
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Callable
+
+from .i18n import set_language
+from .job import Job, job_context
+from .pipeline import PipelineResult
+from .proinfo_country import COUNTRIES
+from .utils import log
+
+FLOWS = ("global", "keep_data")
+LANGUAGES = ("en", "ko", "ru", "jp")
+
+
+class BatchSpecError(ValueError):
+    pass
+
+
+@dataclass(frozen=True)
+class BatchJob:
+    flow: str
+    country: str = ""
+    language: str = "en"
+    serial: str | None = None
+
+
+def make_job(flow: str | None, country: str | None = None, language: str | None = None, serial: str | None = None) -> BatchJob:
+    flow = (flow or "").strip().lower().replace("-", "_")
+    if flow not in FLOWS:
+        raise BatchSpecError(f"unknown flow {flow!r}, expected one of {', '.join(FLOWS)}")
+    country = (country or "").strip().upper()
+    if country and country not in {code for _, code in COUNTRIES}:
+        raise BatchSpecError(f"unknown country code {country!r}")
+    language = (language or "en").strip().lower()
+    if language not in LANGUAGES:
+        raise BatchSpecError(f"unknown language {language!r}, expected one of {', '.join(LANGUAGES)}")
+    serial = (serial or "").strip() or None
+    return BatchJob(flow, country, language, serial)
+
+
+def _read_rows(path: Path) -> list:
+    if path.suffix.lower() == ".csv":
+        with path.open("r", encoding="utf-8-sig", newline="") as f:
+            return list(csv.DictReader(f))
+    data = json.loads(path.read_text(encoding="utf-8-sig"))
+    if isinstance(data, dict):
+        return data.get("jobs", [data])
+    return data
+
+
+def load_jobs(path: Path) -> list[BatchJob]:
+    try:
+        rows = _read_rows(path)
+    except (OSError, ValueError, csv.Error) as e:
+        raise BatchSpecError(f"{path}: {e}")
+    if not isinstance(rows, list) or not rows:
+        raise BatchSpecError(f"{path}: no jobs")
+    jobs: list[BatchJob] = []
+    for i, row in enumerate(rows, start=1):
+        if not isinstance(row, dict):
+            raise BatchSpecError(f"{path}: job {i} is not an object")
+        row = {str(k).strip().lower(): v for k, v in row.items() if k is not None}
+        try:
+            jobs.append(make_job(row.get("flow"), row.get("country"), row.get("language"), row.get("serial")))
+        except BatchSpecError as e:
+            raise BatchSpecError(f"{path}: job {i}: {e}")
+    return jobs
+
+
+def _flow_runner(flow: str) -> Callable[[], PipelineResult]:
+    if flow == "global":
+        from .global_flow import run_global_firmware_upgrade_flow
+
+        return run_global_firmware_upgrade_flow
+    from .fw_upgrade_flow import run_firmware_upgrade_keep_data_flow
+
+    return run_firmware_upgrade_keep_data_flow
+
+
+def run_job(spec: BatchJob) -> dict:
+    set_language(spec.language)
+    entry: dict = asdict(spec)
+    entry.update(ok=False, failed_step=None, error=None)
+    log("batch.job_start", flow=spec.flow, serial=spec.serial or "-", country=spec.country or "-")
+    started = time.monotonic()
+    job = Job(serial=spec.serial, unattended=True, country=spec.country or None)
+    with job_context(job):
+        try:
+            result = _flow_runner(spec.flow)()
+            entry["ok"] = result.ok
+            entry["failed_step"] = result.failed_step
+            entry["timings"] = {name: round(sec, 3) for name, sec in result.timings.items()}
+        except Exception as e:
+            entry["error"] = str(e)
+    entry["seconds"] = round(time.monotonic() - started, 3)
+    if entry["ok"]:
+        log("batch.job_done", flow=spec.flow, serial=spec.serial or "-", sec=f"{entry['seconds']:.1f}")
+    else:
+        log("batch.job_failed", flow=spec.flow, serial=spec.serial or "-", error=entry["error"] or entry["failed_step"])
+    return entry
+
+
+def write_result(report: dict, path: Path) -> None:
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+        os.replace(tmp, path)
+    except OSError:
+        pass
+
+
+def run_batch(jobs: list[BatchJob], result_path: Path | None = None) -> int:
+    results = [run_job(spec) for spec in jobs]
+    ok = sum(1 for entry in results if entry["ok"])
+    log("batch.done", ok=ok, total=len(results))
+    report = {"ok": ok == len(results), "passed": ok, "total": len(results), "jobs": results}
+    if result_path is not None:
+        write_result(report, result_path)
+    print(json.dumps(report, ensure_ascii=False))
+    return 0 if report["ok"] else 1
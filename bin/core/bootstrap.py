@@ -1,3 +1,4 @@
+import argparse
 import os
 import sys
 import subprocess
@@ -5,11 +6,10 @@ import time
 import json
 from pathlib import Path
 
-from .fw_upgrade_flow import run_firmware_upgrade_keep_data_flow
 from .i18n import set_language, get_string
 from .constants import PYTHON_DIR
-from .utils import log, clear_console, kill_adb_server
-from . import downloader
+from .utils import log, clear_console, kill_adb_server, flush_logs
+from . import ready_stamp
 
 LANG_DIR = Path(__file__).resolve().parent / "lang"
 SETTINGS_PATH = LANG_DIR / "settings.json"
@@ -92,6 +92,25 @@ def _choose_language(force_prompt: bool = False) -> None:
         time.sleep(1.5)
 
 
+def _run_station_menu() -> None:
+    from .global_flow import run_global_firmware_upgrade_flow
+    from .fw_upgrade_flow import run_firmware_upgrade_keep_data_flow
+    from .station import run_station
+
+    print(f" 1. {get_string('app.menu.option1')}")
+    print(f" 2. {get_string('app.menu.option2')}")
+    try:
+        choice = input(get_string("station.flow_prompt")).strip()
+    except EOFError:
+        return
+    if choice == "1":
+        run_station(run_global_firmware_upgrade_flow)
+    elif choice == "2":
+        run_station(run_firmware_upgrade_keep_data_flow)
+    else:
+        print(get_string("app.menu.invalid_choice"))
+
+
 def _main_menu() -> None:
     from .global_flow import run_global_firmware_upgrade_flow
     from .fw_upgrade_flow import run_firmware_upgrade_keep_data_flow
@@ -107,6 +126,7 @@ def _main_menu() -> None:
         print(get_string("app.menu.section_install"))
         print(f" 1. {get_string('app.menu.option1')}")
         print(f" 2. {get_string('app.menu.option2')}")
+        print(f" 5. {get_string('app.menu.option5')}")
         print()
         print(get_string("app.menu.section_other"))
         print(f" 3. {get_string('app.menu.option3')}")
@@ -143,6 +163,14 @@ def _main_menu() -> None:
                 input(get_string("app.menu.back_to_menu"))
             except EOFError:
                 pass
+        elif choice == "5":
+            clear_console()
+            print(get_string("app.title"))
+            _run_station_menu()
+            try:
+                input(get_string("app.menu.back_to_menu"))
+            except EOFError:
+                pass
         elif choice == "4":
             try:
                 os.startfile("http://www.youtube.com/@dwas_KR?sub_confirmation=1")
@@ -158,25 +186,83 @@ def _main_menu() -> None:
                 pass
 
 
+def _exec_embedded(exe: Path) -> None:
+    env = os.environ.copy()
+    env["PYTHONUTF8"] = "1"
+    env["PYTHONIOENCODING"] = "utf-8"
+    env["PYTHONPATH"] = str(PYTHON_DIR.parent)
+    args = [str(exe), "-m", "core.bootstrap"] + sys.argv[1:]
+    flush_logs()
+    if os.name == "nt":
+        result = subprocess.run(args, env=env)
+        sys.exit(result.returncode)
+    os.execve(str(exe), args, env)
+
+
+def _provision() -> bool:
+    from . import downloader
+
+    if ready_stamp.is_ready():
+        log("bootstrap.ready")
+        return True
+    results = downloader.ensure_tools()
+    ok_crypto = downloader.ensure_cryptography()
+    if ok_crypto and all(results.values()):
+        ready_stamp.write_stamp()
+    return ok_crypto
+
+
+def _parse_args(argv: list[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="core.bootstrap", description="LPMBox firmware installer")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--batch", metavar="FILE", help="run the jobs listed in a JSON or CSV file without prompts")
+    source.add_argument("--flow", choices=("global", "keep_data"), help="run a single flow without prompts")
+    parser.add_argument("--country", help="country code written to proinfo (default: keep current)")
+    parser.add_argument("--language", help="log language: en, ko, ru or jp")
+    parser.add_argument("--serial", help="ADB serial of the target device")
+    parser.add_argument("--result", metavar="FILE", help="write the JSON result to this file")
+    return parser.parse_args(argv)
+
+
+def _run_batch(args: argparse.Namespace) -> int:
+    from .batch import BatchSpecError, load_jobs, make_job, run_batch
+
+    try:
+        if args.batch:
+            jobs = load_jobs(Path(args.batch))
+        else:
+            jobs = [make_job(args.flow, args.country, args.language, args.serial)]
+    except BatchSpecError as e:
+        log("batch.invalid_spec", error=str(e))
+        return 2
+    log("bootstrap.start")
+    try:
+        if not _provision():
+            return 3
+        return run_batch(jobs, Path(args.result) if args.result else None)
+    finally:
+        kill_adb_server()
+
+
 def main() -> None:
+    args = _parse_args(sys.argv[1:])
     set_language("en")
-    exe_embed = downloader.ensure_python_embed()
-    if exe_embed is not None and not _is_embedded():
-        log("bootstrap.embedded_restart")
-        env = os.environ.copy()
-        env["PYTHONUTF8"] = "1"
-        env["PYTHONIOENCODING"] = "utf-8"
-        env["PYTHONPATH"] = str(PYTHON_DIR.parent)
-        subprocess.run([str(exe_embed), "-m", "core.bootstrap"], env=env, check=True)
-        return
+    if not _is_embedded():
+        exe_embed = PYTHON_DIR / "python.exe"
+        if not exe_embed.is_file():
+            from . import downloader
+
+            exe_embed = downloader.ensure_python_embed()
+        if exe_embed is not None:
+            log("bootstrap.embedded_restart")
+            _exec_embedded(exe_embed)
+            return
+    if args.batch or args.flow:
+        sys.exit(_run_batch(args))
     clear_console()
     _choose_language()
     log("bootstrap.start")
-    downloader.ensure_platform_tools()
-    downloader.ensure_spflashtool()
-    downloader.ensure_prc()
-    ok_crypto = downloader.ensure_cryptography()
-    if not ok_crypto:
+    if not _provision():
         try:
             input(get_string("app.press_enter"))
         except EOFError:
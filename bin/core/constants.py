@@ -11,13 +11,29 @@ TOOLS_DOWNLOAD_DIR = TOOLS_DIR / "download files"
 SPFT_EXE = TOOLS_DIR / "SPFlashToolV6.exe"
 PRC_DIR = TOOLS_DIR / "PRC"
 READBACK_DIR = TOOLS_DIR / "Readback"
+MANIFESTS_DIR = TOOLS_DIR / "manifests"
+ARTIFACT_STORE_DIR = TOOLS_DIR / "store"
+READY_STAMP_FILE = TOOLS_DIR / "ready.json"
+ARTIFACT_STORE_ENV = "MTK_ARTIFACT_STORE"
+ARTIFACT_STORE_MAX_BYTES = 2 * 1024 * 1024 * 1024
+SCATTER_CACHE_DIR = TOOLS_DIR / "cache" / "scatter"
+SCATTER_CACHE_MAX_BYTES = 64 * 1024 * 1024
 DOWNLOAD_AGENT_IMAGE_DIR = IMAGE_DIR / "download_agent"
 FLASH_XML_DLAGENT = DOWNLOAD_AGENT_IMAGE_DIR / "flash.xml"
 FLASH_XML_ROOT = IMAGE_DIR / "flash.xml"
 DA_AUTH_DLAGENT = DOWNLOAD_AGENT_IMAGE_DIR / "da.auth"
 DA_AUTH_ROOT = IMAGE_DIR / "da.auth"
 LOGS_DIR = BASE_DIR / "logs"
+WORKSPACES_DIR = BASE_DIR / "workspaces"
 LOG_ENV_VAR = "MTK_LOG_FILE"
+TRACE_DIR = LOGS_DIR / "traces"
+TRACE_ENV_VAR = "MTK_TRACE"
+LOG_JSONL_ENV_VAR = "MTK_LOG_JSONL"
+FLASH_SLOTS_ENV_VAR = "MTK_FLASH_SLOTS"
+FLASH_SLOTS_DEFAULT = 1
+LOG_QUEUE_MAX = 10000
+LOG_BATCH_MAX = 256
+LOG_FLUSH_SEC = 0.2
 
 PLATFORM_TOOLS_URLS = [
     "https://dl.google.com/android/repository/platform-tools-latest-windows.zip?hl"
@@ -33,8 +49,70 @@ PRC_ZIP_URLS = [
     "https://github.com/dwas-KR/LPMBox/raw/Downloads/PRC.zip"
 ]
 
+PLATFORM_TOOLS_MEMBERS = (
+    "platform-tools/adb.exe",
+    "platform-tools/fastboot.exe",
+    "platform-tools/make_f2fs*.exe",
+    "platform-tools/mke2fs*",
+    "platform-tools/*.dll",
+    "platform-tools/source.properties",
+)
+SPFT_ZIP_PREFIX = "SP_Flash_Tool_V6.2404_Win/"
+PRC_MEMBERS = ("lk.img", "dtbo.img")
+ZIP_PARALLEL_MIN_BYTES = 4 * 1024 * 1024
+ZIP_PARALLEL_WORKERS = 4
+
+DOWNLOAD_CHUNK_SIZE = 256 * 1024
+DOWNLOAD_TIMEOUT_SEC = 60
+DOWNLOAD_RETRIES = 5
+DOWNLOAD_SEGMENTS = 4
+DOWNLOAD_SEGMENT_MIN_BYTES = 8 * 1024 * 1024
+DOWNLOAD_PROGRESS_INTERVAL_SEC = 0.5
+DOWNLOAD_MAX_CONNECTIONS = 6
+
+MIRROR_STATS_FILE = TOOLS_DIR / "cache" / "mirrors.json"
+MIRROR_STATS_TTL_SEC = 24 * 3600
+MIRROR_PROBE_BYTES = 64 * 1024
+MIRROR_PROBE_TIMEOUT_SEC = 5
+MIRROR_MIN_RATE_BPS = 100 * 1024
+MIRROR_RATE_WINDOW_SEC = 10
+MIRROR_RATE_GRACE_SEC = 15
+
 PYTHON_VERSION = "3.14.2"
 PYTHON_EMBED_URL_TEMPLATE = "https://www.python.org/ftp/python/{version}/python-{version}-embed-{arch}.zip"
 PYTHON_PTH_FILENAME = "python314._pth"
 GET_PIP_URL = "https://bootstrap.pypa.io/get-pip.py"
 REQUIRED_PYTHON_PACKAGES = ["cffi", "pycparser", "cryptography"]
+
+IMPORT_BUDGET_MS = 150
+IMPORT_BUDGET_FORBIDDEN = (
+    "cryptography",
+    "xml.etree.ElementTree",
+    "urllib.request",
+    "zipfile",
+    "core.downloader",
+    "core.fw_upgrade_flow",
+    "core.global_flow",
+    "core.scatter",
+)
+
+READINESS_POLL_SEC = 0.1
+READINESS_LIMITS: dict[str, tuple[float, float]] = {
+    "prc_images": (0.0, 5.0),
+    "spft_window": (1.0, 5.0),
+}
+USB_SYSFS_ROOT = Path("/sys/bus/usb/devices")
+USB_POLL_SEC = 0.5
+USB_SYSFS_POLL_SEC = 0.05
+PRELOADER_VID = "0e8d"
+PRELOADER_PID = "2000"
+PRELOADER_NAME_HINTS = ("preloader", "mediatek usb port")
+UNATTENDED_DEVICE_TIMEOUT_SEC = 300
+UNATTENDED_READBACK_TIMEOUT_SEC = 600
+UNATTENDED_PRELOADER_TIMEOUT_SEC = 180
+
+READBACK_POLL_SEC = 0.25
+READBACK_SETTLE_SEC = 0.5
+READBACK_MTIME_SLACK_SEC = 2.0
+READBACK_TIMEOUT_SEC = 1800
+READBACK_SHARED_STABLE_SEC = 10.0
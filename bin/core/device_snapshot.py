@@ -0,0 +1,88 @@
+import re
+import threading
+from dataclasses import dataclass, field
+
+from .job import current_job
+
+PROP_HW_VERSION = "ro.vendor.config.lgsi.hw.version"
+PROP_CPUINFO = "ro.vendor.config.lgsi.cpuinfo"
+PROP_REGION = "ro.config.zui.region"
+PROP_PLATFORM = "ro.vendor.mediatek.platform"
+PROP_SERIALNO = "ro.serialno"
+
+_PROP_LINE_RE = re.compile(r"^\[([^\]]+)\]:\s*\[(.*)\]\s*$")
+
+_cache: dict[str, "DeviceSnapshot"] = {}
+_cache_lock = threading.Lock()
+
+
+@dataclass(frozen=True)
+class DeviceSnapshot:
+    serial: str
+    props: dict[str, str] = field(default_factory=dict)
+
+    def get(self, name: str, default: str = "") -> str:
+        return self.props.get(name, default)
+
+    @property
+    def hw_version(self) -> str:
+        return self.get(PROP_HW_VERSION)
+
+    @property
+    def cpuinfo(self) -> str:
+        return self.get(PROP_CPUINFO)
+
+    @property
+    def region(self) -> str:
+        return self.get(PROP_REGION).strip().upper()
+
+    @property
+    def platform(self) -> str:
+        return self.get(PROP_PLATFORM).strip().upper()
+
+
+def parse_getprop(text: str) -> dict[str, str]:
+    props: dict[str, str] = {}
+    for line in text.splitlines():
+        m = _PROP_LINE_RE.match(line.strip())
+        if m:
+            props[m.group(1)] = m.group(2)
+    return props
+
+
+def _fetch_snapshot(serial: str | None) -> DeviceSnapshot:
+    from .utils import run_adb
+
+    args = ["-s", serial] if serial else []
+    try:
+        cp = run_adb(args + ["shell", "getprop"], capture_output=True)
+    except Exception:
+        return DeviceSnapshot(serial or "")
+    if cp.returncode != 0:
+        return DeviceSnapshot(serial or "")
+    props = parse_getprop(cp.stdout or "")
+    return DeviceSnapshot(serial or props.get(PROP_SERIALNO, ""), props)
+
+
+def get_device_snapshot(serial: str | None = None, refresh: bool = False) -> DeviceSnapshot:
+    serial = serial or current_job().serial
+    key = serial or ""
+    if not refresh:
+        with _cache_lock:
+            cached = _cache.get(key)
+        if cached is not None:
+            return cached
+    snapshot = _fetch_snapshot(serial)
+    if snapshot.props:
+        with _cache_lock:
+            _cache[key] = snapshot
+    return snapshot
+
+
+def invalidate_device_snapshot(serial: str | None = None) -> None:
+    with _cache_lock:
+        if serial is None:
+            _cache.clear()
+            return
+        _cache.pop(serial, None)
+        _cache.pop("", None)
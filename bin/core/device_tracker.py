@@ -0,0 +1,124 @@
+import threading
+import time
+from typing import Callable
+
+from .adb_client import AdbClient, AdbError, get_client
+
+READY_STATES = ("device",)
+WAKE_STATES = ("device", "unauthorized")
+
+
+class DeviceTracker:
+    def __init__(self, client: AdbClient | None = None) -> None:
+        self._client = client or get_client()
+        self._cond = threading.Condition()
+        self._states: dict[str, str] = {}
+        self._version = 0
+        self._alive = False
+        self._sock = None
+        self._thread: threading.Thread | None = None
+
+    @property
+    def alive(self) -> bool:
+        return self._alive
+
+    def start(self) -> bool:
+        with self._cond:
+            if self._alive:
+                return True
+        try:
+            sock = self._client.track_devices()
+        except (OSError, AdbError):
+            return False
+        with self._cond:
+            self._sock = sock
+            self._alive = True
+        self._thread = threading.Thread(target=self._run, args=(sock,), name="adb-track-devices", daemon=True)
+        self._thread.start()
+        return True
+
+    def stop(self) -> None:
+        with self._cond:
+            sock = self._sock
+        if sock is not None:
+            try:
+                sock.close()
+            except OSError:
+                pass
+
+    def _run(self, sock) -> None:
+        try:
+            while True:
+                devices = self._client.read_device_update(sock)
+                with self._cond:
+                    self._states = dict(devices)
+                    self._version += 1
+                    self._cond.notify_all()
+        except (OSError, AdbError, ValueError):
+            pass
+        finally:
+            try:
+                sock.close()
+            except OSError:
+                pass
+            with self._cond:
+                self._alive = False
+                self._sock = None
+                self._states = {}
+                self._version += 1
+                self._cond.notify_all()
+
+    def sync(self, timeout: float = 2.0) -> bool:
+        with self._cond:
+            return self._cond.wait_for(lambda: self._version > 0 or not self._alive, timeout)
+
+    def states(self) -> dict[str, str]:
+        with self._cond:
+            return dict(self._states)
+
+    def wait_for(
+        self,
+        serial: str | None = None,
+        states: tuple[str, ...] = READY_STATES,
+        timeout: float | None = None,
+        on_change: Callable[[str, str], None] | None = None,
+    ) -> str | None:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        seen: dict[str, str] = {}
+        version = -1
+        while True:
+            with self._cond:
+                while self._version == version and self._alive:
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        return None
+                    self._cond.wait(remaining)
+                version = self._version
+                current = dict(self._states)
+                alive = self._alive
+            for sn, state in current.items():
+                if serial is not None and sn != serial:
+                    continue
+                if on_change is not None and seen.get(sn) != state:
+                    on_change(sn, state)
+                if state in states:
+                    return sn
+            seen = current
+            if not alive:
+                return None
+            if deadline is not None and time.monotonic() >= deadline:
+                return None
+
+
+_tracker: DeviceTracker | None = None
+_tracker_lock = threading.Lock()
+
+
+def get_tracker() -> DeviceTracker | None:
+    global _tracker
+    with _tracker_lock:
+        if _tracker is None:
+            _tracker = DeviceTracker()
+        if _tracker.alive or _tracker.start():
+            return _tracker
+    return None
@@ -1,10 +1,15 @@
-import platform
+import fnmatch
+import hashlib
+import json
+import os
 import shutil
 import subprocess
-import zipfile
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from urllib.error import HTTPError, URLError
-from urllib.request import Request, urlopen
+from typing import TYPE_CHECKING, Callable
 
 from .constants import (
     TOOLS_DIR,
@@ -21,38 +26,559 @@ from .constants import (
     REQUIRED_PYTHON_PACKAGES,
     SPFT_EXE,
     PRC_DIR,
+    DOWNLOAD_CHUNK_SIZE,
+    DOWNLOAD_TIMEOUT_SEC,
+    DOWNLOAD_RETRIES,
+    DOWNLOAD_SEGMENTS,
+    DOWNLOAD_SEGMENT_MIN_BYTES,
+    DOWNLOAD_PROGRESS_INTERVAL_SEC,
+    DOWNLOAD_MAX_CONNECTIONS,
+    MANIFESTS_DIR,
+    PLATFORM_TOOLS_MEMBERS,
+    PRC_MEMBERS,
+    SPFT_ZIP_PREFIX,
+    ZIP_PARALLEL_MIN_BYTES,
+    ZIP_PARALLEL_WORKERS,
+    MIRROR_PROBE_BYTES,
+    MIRROR_PROBE_TIMEOUT_SEC,
+    MIRROR_MIN_RATE_BPS,
+    MIRROR_RATE_WINDOW_SEC,
+    MIRROR_RATE_GRACE_SEC,
 )
 from .utils import log
+from . import artifact_store, mirrors
 
+if TYPE_CHECKING:
+    import zipfile
 
-def _download_file(url: str, dest: Path) -> None:
+
+_connection_slots = threading.BoundedSemaphore(DOWNLOAD_MAX_CONNECTIONS)
+
+
+class DownloadError(OSError):
+    pass
+
+
+class SlowMirrorError(DownloadError):
+    pass
+
+
+ProgressCallback = Callable[[int, int | None, float], None]
+
+
+class _Progress:
+    def __init__(self, total: int | None, callback: ProgressCallback | None, min_rate: float | None = None) -> None:
+        self.total = total
+        self.callback = callback
+        self.min_rate = min_rate
+        self.slow = False
+        self._parts: dict[object, int] = {}
+        self._transferred = 0
+        self._lock = threading.Lock()
+        self._start = time.monotonic()
+        self._last = 0.0
+        self._window_start = self._start
+        self._window_bytes = 0
+
+    @property
+    def rate(self) -> float:
+        with self._lock:
+            return self._transferred / max(time.monotonic() - self._start, 1e-6)
+
+    def _check_rate(self, now: float) -> None:
+        if not self.min_rate or now - self._window_start < MIRROR_RATE_WINDOW_SEC:
+            return
+        window_rate = (self._transferred - self._window_bytes) / (now - self._window_start)
+        if now - self._start >= MIRROR_RATE_GRACE_SEC and window_rate < self.min_rate:
+            self.slow = True
+        self._window_start = now
+        self._window_bytes = self._transferred
+
+    def begin(self, key: object, already: int) -> None:
+        with self._lock:
+            self._parts[key] = already
+
+    def add(self, key: object, n: int, force: bool = False) -> None:
+        with self._lock:
+            self._parts[key] = self._parts.get(key, 0) + n
+            self._transferred += n
+            now = time.monotonic()
+            self._check_rate(now)
+            if not force and now - self._last < DOWNLOAD_PROGRESS_INTERVAL_SEC:
+                return
+            self._last = now
+            rate = self._transferred / max(now - self._start, 1e-6)
+            done = sum(self._parts.values())
+        if self.callback is not None:
+            self.callback(done, self.total, rate)
+
+
+def log_progress(name: str) -> ProgressCallback:
+    state = {"step": -1}
+
+    def callback(done: int, total: int | None, rate: float) -> None:
+        if not total:
+            return
+        percent = min(100, done * 100 // total)
+        step = percent // 10
+        if step == state["step"]:
+            return
+        state["step"] = step
+        log(
+            "dl.progress",
+            name=name,
+            percent=percent,
+            done_mb=f"{done / 1048576:.1f}",
+            total_mb=f"{total / 1048576:.1f}",
+            rate=f"{rate / 1048576:.2f}",
+        )
+
+    return callback
+
+
+def _urlopen(url: str, headers: dict[str, str] | None = None, method: str | None = None, timeout: float = DOWNLOAD_TIMEOUT_SEC):
+    from urllib.request import Request, urlopen
+
+    h = {"User-Agent": "Mozilla/5.0"}
+    if headers:
+        h.update(headers)
+    return urlopen(Request(url, headers=h, method=method), timeout=timeout)
+
+
+def _is_retryable(e: Exception) -> bool:
+    from urllib.error import HTTPError
+
+    if isinstance(e, HTTPError):
+        return e.code >= 500 or e.code in (408, 429)
+    return isinstance(e, OSError)
+
+
+def _probe(url: str) -> tuple[str, int | None, bool]:
+    with _connection_slots:
+        return _probe_unlocked(url)
+
+
+def _probe_unlocked(url: str) -> tuple[str, int | None, bool]:
+    from urllib.error import HTTPError
+
+    try:
+        with _urlopen(url, method="HEAD") as resp:
+            length = resp.headers.get("Content-Length")
+            ranges = resp.headers.get("Accept-Ranges", "").lower() == "bytes"
+            if length is not None and ranges:
+                return resp.geturl(), int(length), True
+    except (OSError, ValueError):
+        pass
+    try:
+        with _urlopen(url, {"Range": "bytes=0-0"}) as resp:
+            final_url = resp.geturl()
+            if resp.status == 206:
+                content_range = resp.headers.get("Content-Range", "")
+                total = content_range.rsplit("/", 1)[-1]
+                return final_url, int(total) if total.isdigit() else None, True
+            length = resp.headers.get("Content-Length")
+            return final_url, int(length) if length and length.isdigit() else None, False
+    except HTTPError:
+        raise
+    except (OSError, ValueError):
+        return url, None, False
+
+
+def _fetch_range(url: str, path: Path, start: int, end: int | None, ranges: bool, progress: _Progress) -> None:
+    with _connection_slots:
+        _fetch_range_unlocked(url, path, start, end, ranges, progress)
+
+
+def _fetch_range_unlocked(url: str, path: Path, start: int, end: int | None, ranges: bool, progress: _Progress) -> None:
+    have = path.stat().st_size if path.is_file() else 0
+    if end is not None and have >= end - start + 1:
+        return
+    headers: dict[str, str] = {}
+    offset = start + have
+    if ranges and (offset > 0 or end is not None):
+        headers["Range"] = f"bytes={offset}-" + ("" if end is None else str(end))
+    elif not ranges:
+        have = 0
+        offset = start
+    with _urlopen(url, headers) as resp:
+        if "Range" in headers and resp.status != 206:
+            if start != 0 or end is not None:
+                raise DownloadError("server ignored the byte range")
+            have = 0
+        progress.begin(start, have)
+        length = resp.headers.get("Content-Length")
+        expected = int(length) if length and length.isdigit() else None
+        received = 0
+        mode = "ab" if have else "wb"
+        with path.open(mode) as f:
+            while True:
+                chunk = resp.read(DOWNLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                f.write(chunk)
+                received += len(chunk)
+                progress.add(start, len(chunk))
+                if progress.slow:
+                    raise SlowMirrorError(f"throughput below {progress.min_rate / 1024:.0f} KB/s")
+        if expected is not None and received < expected:
+            raise ConnectionError(f"connection dropped after {received} of {expected} bytes")
+
+
+def _with_retries(fn: Callable[[], None]) -> None:
+    attempt = 0
+    while True:
+        try:
+            fn()
+            return
+        except OSError as e:
+            attempt += 1
+            if attempt > DOWNLOAD_RETRIES or not _is_retryable(e) or isinstance(e, DownloadError):
+                raise
+            log("dl.retry", attempt=attempt, retries=DOWNLOAD_RETRIES)
+            time.sleep(min(2 ** attempt, 10))
+
+
+def _download_segmented(url: str, part: Path, size: int, segments: int, progress: _Progress) -> None:
+    bounds: list[tuple[int, int]] = []
+    step = -(-size // segments)
+    for start in range(0, size, step):
+        bounds.append((start, min(start + step, size) - 1))
+    seg_paths = [part.with_name(f"{part.name}{i}") for i in range(len(bounds))]
+
+    def fetch(i: int) -> None:
+        start, end = bounds[i]
+        _with_retries(lambda: _fetch_range(url, seg_paths[i], start, end, True, progress))
+
+    with ThreadPoolExecutor(max_workers=len(bounds)) as pool:
+        for future in [pool.submit(fetch, i) for i in range(len(bounds))]:
+            future.result()
+
+    with part.open("wb") as out:
+        for seg in seg_paths:
+            with seg.open("rb") as f:
+                shutil.copyfileobj(f, out, DOWNLOAD_CHUNK_SIZE)
+    for seg in seg_paths:
+        seg.unlink()
+
+
+def _verify(path: Path, expected_size: int | None, sha256: str | None) -> None:
+    size = path.stat().st_size
+    if expected_size is not None and size != expected_size:
+        raise DownloadError(f"size mismatch: {size} != {expected_size}")
+    if sha256:
+        h = hashlib.sha256()
+        with path.open("rb") as f:
+            for chunk in iter(lambda: f.read(DOWNLOAD_CHUNK_SIZE), b""):
+                h.update(chunk)
+        if h.hexdigest().lower() != sha256.lower():
+            raise DownloadError("sha256 mismatch")
+    if path.name.lower().endswith(".zip.part"):
+        import zipfile
+
+        try:
+            with zipfile.ZipFile(path) as zf:
+                zf.infolist()
+        except zipfile.BadZipFile as e:
+            raise DownloadError(f"broken zip: {e}")
+
+
+def _discard_partial(part: Path) -> None:
+    for p in [part, *part.parent.glob(f"{part.name}[0-9]*")]:
+        try:
+            p.unlink()
+        except OSError:
+            pass
+
+
+def _check_partial(part: Path, total: int | None) -> None:
+    meta = part.with_name(part.name + ".src")
+    stamp = f"{total}"
+    try:
+        previous = meta.read_text(encoding="utf-8").strip()
+    except OSError:
+        previous = None
+    if previous is not None and previous != stamp:
+        _discard_partial(part)
+    try:
+        meta.write_text(stamp, encoding="utf-8")
+    except OSError:
+        pass
+
+
+def _is_stale_partial(e: OSError) -> bool:
+    from urllib.error import HTTPError
+
+    if isinstance(e, HTTPError):
+        return e.code == 416
+    return isinstance(e, DownloadError) and not isinstance(e, SlowMirrorError)
+
+
+def _drop_stale_partial(part: Path, dest: Path, e: OSError) -> None:
+    if _is_stale_partial(e):
+        log("dl.verify_failed", name=dest.name, reason=str(e))
+        _discard_partial(part)
+
+
+def _fetch_and_verify(
+    url: str, part: Path, total: int | None, sha256: str | None, ranges: bool, segments: int, tracker: _Progress
+) -> None:
+    complete = total is not None and part.is_file() and part.stat().st_size == total
+    if complete:
+        tracker.begin(0, total)
+    else:
+        if segments > 1 and ranges and total and total >= DOWNLOAD_SEGMENT_MIN_BYTES:
+            _download_segmented(url, part, total, segments, tracker)
+        else:
+            _with_retries(lambda: _fetch_range(url, part, 0, None, ranges, tracker))
+    tracker.add(None, 0, force=True)
+    _verify(part, total, sha256)
+
+
+def _download_file(
+    url: str,
+    dest: Path,
+    expected_size: int | None = None,
+    sha256: str | None = None,
+    progress: ProgressCallback | None = None,
+    segments: int = 1,
+    min_rate: float | None = None,
+) -> float:
     dest.parent.mkdir(parents=True, exist_ok=True)
-    req = Request(url, headers={"User-Agent": "Mozilla/5.0"})
-    with urlopen(req, timeout=600) as resp:
-        with dest.open("wb") as f:
-            shutil.copyfileobj(resp, f)
+    part = dest.with_name(dest.name + ".part")
+    final_url, size, ranges = _probe(url)
+    if expected_size is not None and size is not None and size != expected_size:
+        raise DownloadError(f"size mismatch: {size} != {expected_size}")
+    total = expected_size if expected_size is not None else size
+    _check_partial(part, total)
+    have = sum(p.stat().st_size for p in [part, *part.parent.glob(f"{part.name}[0-9]*")] if p.is_file())
+    if total is not None and part.is_file() and part.stat().st_size > total:
+        _discard_partial(part)
+        have = 0
+    if have and ranges:
+        log("dl.resume", name=dest.name, done_mb=f"{have / 1048576:.1f}")
+    tracker = _Progress(total, progress or log_progress(dest.name), min_rate)
+    try:
+        _fetch_and_verify(final_url, part, total, sha256, ranges, segments, tracker)
+    except OSError as e:
+        if not have or not _is_stale_partial(e):
+            _drop_stale_partial(part, dest, e)
+            raise
+        log("dl.restart", name=dest.name, reason=str(e))
+        _discard_partial(part)
+        tracker = _Progress(total, progress or log_progress(dest.name), min_rate)
+        try:
+            _fetch_and_verify(final_url, part, total, sha256, ranges, segments, tracker)
+        except OSError as e2:
+            _drop_stale_partial(part, dest, e2)
+            raise
+    os.replace(part, dest)
+    try:
+        part.with_name(part.name + ".src").unlink()
+    except OSError:
+        pass
+    return tracker.rate
 
 
-def _download_from_list(urls: list[str], dest: Path) -> None:
+def _probe_mirror(url: str) -> tuple[float, float] | None:
+    headers = {"Range": f"bytes=0-{MIRROR_PROBE_BYTES - 1}"}
+    try:
+        with _connection_slots:
+            started = time.monotonic()
+            with _urlopen(url, headers, timeout=MIRROR_PROBE_TIMEOUT_SEC) as resp:
+                ttfb = time.monotonic() - started
+                received = 0
+                while received < MIRROR_PROBE_BYTES:
+                    chunk = resp.read(MIRROR_PROBE_BYTES - received)
+                    if not chunk:
+                        break
+                    received += len(chunk)
+            elapsed = max(time.monotonic() - started - ttfb, 1e-3)
+    except (OSError, ValueError):
+        return None
+    return ttfb, received / elapsed
+
+
+def _rank_mirrors(urls: list[str]) -> list[str]:
+    stats = mirrors.load_stats(urls)
+    if not mirrors.is_fresh(stats, urls):
+        with ThreadPoolExecutor(max_workers=len(urls)) as pool:
+            results = list(pool.map(_probe_mirror, urls))
+        for url, result in zip(urls, results):
+            if result is None:
+                mirrors.record(url, failed=True)
+            else:
+                mirrors.record(url, ttfb=result[0], rate=result[1])
+        stats = mirrors.load_stats(urls)
+    return mirrors.rank(urls, stats)
+
+
+def _download_from_list(
+    urls: list[str],
+    dest: Path,
+    expected_size: int | None = None,
+    sha256: str | None = None,
+    segments: int = 1,
+) -> None:
     last_error: Exception | None = None
-    for url in urls:
+    ranked = _rank_mirrors(urls) if len(urls) > 1 else list(urls)
+    if len(ranked) > 1:
+        log("dl.mirror_selected", name=dest.name, mirror=mirrors.mirror_label(ranked[0]))
+    for i, url in enumerate(ranked):
+        min_rate = MIRROR_MIN_RATE_BPS if i < len(ranked) - 1 else None
         try:
-            _download_file(url, dest)
+            rate = _download_file(url, dest, expected_size=expected_size, sha256=sha256, segments=segments, min_rate=min_rate)
+            mirrors.record(url, rate=rate)
             return
-        except (URLError, HTTPError, OSError) as e:
+        except SlowMirrorError as e:
+            mirrors.record(url, failed=True)
+            log("dl.mirror_slow", name=dest.name, mirror=mirrors.mirror_label(url), next=mirrors.mirror_label(ranked[i + 1]))
+            last_error = e
+        except OSError as e:
+            mirrors.record(url, failed=True)
             last_error = e
     log("dl.download_failed")
     if last_error is not None:
         raise last_error
 
 
-def _extract_zip(zip_path: Path, dest_dir: Path) -> None:
+def _fetch_artifact(
+    name: str,
+    urls: list[str],
+    dest: Path,
+    expected_size: int | None = None,
+    sha256: str | None = None,
+    segments: int = 1,
+) -> None:
+    if artifact_store.materialize(name, dest):
+        log("dl.store_hit", name=name)
+        return
+    _download_from_list(urls, dest, expected_size=expected_size, sha256=sha256, segments=segments)
+    artifact_store.add(name, dest, urls)
+
+
+MemberRemap = Callable[[str], str | None]
+
+
+def _strip_prefix(prefix: str) -> MemberRemap:
+    def remap(name: str) -> str | None:
+        if name.startswith(prefix):
+            return name[len(prefix) :] or None
+        return name
+
+    return remap
+
+
+def _manifest_path(name: str) -> Path:
+    return MANIFESTS_DIR / f"{name}.json"
+
+
+def _safe_target(dest_dir: Path, rel: str) -> Path | None:
+    target = (dest_dir / rel).resolve()
+    root = dest_dir.resolve()
+    if target != root and root not in target.parents:
+        return None
+    return target
+
+
+def _extract_member(zf: "zipfile.ZipFile", info: "zipfile.ZipInfo", target: Path) -> None:
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp = target.with_name(target.name + ".part")
+    with zf.open(info) as src, tmp.open("wb") as dst:
+        shutil.copyfileobj(src, dst, DOWNLOAD_CHUNK_SIZE)
+    os.replace(tmp, target)
+
+
+def _extract_large_member(zip_path: Path, info: "zipfile.ZipInfo", target: Path) -> None:
+    import zipfile
+
+    with zipfile.ZipFile(zip_path, "r") as zf:
+        _extract_member(zf, info, target)
+
+
+def _extract_zip(
+    zip_path: Path,
+    dest_dir: Path,
+    members: tuple[str, ...] | None = None,
+    remap: MemberRemap | None = None,
+    manifest_name: str | None = None,
+) -> list[dict]:
+    import zipfile
+
     dest_dir.mkdir(parents=True, exist_ok=True)
+    entries: list[dict] = []
+    large: list[tuple["zipfile.ZipInfo", Path]] = []
     with zipfile.ZipFile(zip_path, "r") as zf:
-        zf.extractall(dest_dir)
+        for info in zf.infolist():
+            if members is not None and not any(fnmatch.fnmatchcase(info.filename, m) for m in members):
+                continue
+            rel = remap(info.filename) if remap is not None else info.filename
+            if not rel:
+                continue
+            target = _safe_target(dest_dir, rel)
+            if target is None:
+                continue
+            if info.is_dir():
+                target.mkdir(parents=True, exist_ok=True)
+                continue
+            entries.append({"name": rel.rstrip("/"), "size": info.file_size, "crc": info.CRC})
+            if info.file_size >= ZIP_PARALLEL_MIN_BYTES:
+                large.append((info, target))
+            else:
+                _extract_member(zf, info, target)
+    if large:
+        with ThreadPoolExecutor(max_workers=min(len(large), ZIP_PARALLEL_WORKERS)) as pool:
+            for future in [pool.submit(_extract_large_member, zip_path, info, target) for info, target in large]:
+                future.result()
+    if manifest_name is not None:
+        _write_manifest(manifest_name, zip_path, dest_dir, entries)
+    return entries
+
+
+def _write_manifest(name: str, zip_path: Path, dest_dir: Path, entries: list[dict]) -> None:
+    try:
+        MANIFESTS_DIR.mkdir(parents=True, exist_ok=True)
+        data = {"archive": zip_path.name, "root": str(dest_dir), "members": entries}
+        tmp = _manifest_path(name).with_suffix(".tmp")
+        tmp.write_text(json.dumps(data, indent=2), encoding="utf-8")
+        os.replace(tmp, _manifest_path(name))
+    except OSError:
+        pass
+
+
+def _file_crc(path: Path) -> int:
+    crc = 0
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(DOWNLOAD_CHUNK_SIZE), b""):
+            crc = zlib.crc32(chunk, crc)
+    return crc
+
+
+def check_install(name: str, dest_dir: Path, deep: bool = False) -> bool | None:
+    path = _manifest_path(name)
+    if not path.is_file():
+        return None
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+        members = data["members"]
+    except (OSError, ValueError, KeyError):
+        return False
+    if not members:
+        return False
+    for entry in members:
+        target = dest_dir / entry["name"]
+        try:
+            if target.stat().st_size != entry["size"]:
+                return False
+            if deep and _file_crc(target) != entry["crc"]:
+                return False
+        except OSError:
+            return False
+    return True
 
 
 def _detect_arch() -> str:
+    import platform
+
     name = platform.machine().lower()
     if "arm" in name:
         return "arm64"
@@ -74,7 +600,7 @@ def ensure_python_embed() -> Path | None:
 
     log("dl.python_downloading", arch=arch)
     try:
-        _download_file(url, zip_path)
+        _fetch_artifact(filename, [url], zip_path)
     except Exception:
         return None
 
@@ -97,7 +623,7 @@ def ensure_python_embed() -> Path | None:
 
     try:
         get_pip_py = PYTHON_DIR / "get-pip.py"
-        _download_file(GET_PIP_URL, get_pip_py)
+        _fetch_artifact("get-pip.py", [GET_PIP_URL], get_pip_py)
     except Exception:
         return None
 
@@ -116,33 +642,38 @@ def ensure_python_embed() -> Path | None:
     return exe
 
 
-def ensure_platform_tools() -> None:
+def _installed(name: str, dest_dir: Path, marker: Path) -> bool:
+    status = check_install(name, dest_dir)
+    if status is None:
+        return marker.is_file()
+    return status
+
+
+def ensure_platform_tools() -> bool:
     adb = PLATFORM_TOOLS_DIR / "adb.exe"
-    if adb.is_file():
+    fastboot = PLATFORM_TOOLS_DIR / "fastboot.exe"
+    if _installed("platform-tools", TOOLS_DIR, adb) and fastboot.is_file():
         log("dl.pt_skip")
-        return
+        return True
 
     zip_path = TOOLS_DOWNLOAD_DIR / "platform-tools.zip"
 
     log("dl.pt_downloading")
-    _download_from_list(PLATFORM_TOOLS_URLS, zip_path)
+    _fetch_artifact(zip_path.name, PLATFORM_TOOLS_URLS, zip_path)
 
     log("dl.pt_extracting")
-    _extract_zip(zip_path, TOOLS_DIR)
+    _extract_zip(zip_path, TOOLS_DIR, members=PLATFORM_TOOLS_MEMBERS, manifest_name="platform-tools")
 
-    if adb.is_file():
+    if adb.is_file() and fastboot.is_file():
         log("dl.pt_ready", path=str(PLATFORM_TOOLS_DIR))
+        return True
 
-
-def _find_file_recursively(root: Path, name: str) -> Path | None:
-    for path in root.rglob(name):
-        if path.is_file():
-            return path
-    return None
+    log("dl.pt_missing_after_extract")
+    return False
 
 
 def ensure_spflashtool() -> bool:
-    if SPFT_EXE.is_file():
+    if _installed("spflashtool", TOOLS_DIR, SPFT_EXE):
         log("dl.spft_skip")
         return True
 
@@ -155,31 +686,13 @@ def ensure_spflashtool() -> bool:
 
     log("dl.spft_downloading")
     try:
-        _download_from_list(SPFT_ZIP_URLS, zip_path)
+        _fetch_artifact(zip_path.name, SPFT_ZIP_URLS, zip_path, segments=DOWNLOAD_SEGMENTS)
     except Exception:
         log("dl.download_failed")
         return False
 
     log("dl.spft_extracting")
-    _extract_zip(zip_path, TOOLS_DIR)
-
-    extracted_dir = TOOLS_DIR / "SP_Flash_Tool_V6.2404_Win"
-    if extracted_dir.is_dir():
-        for item in extracted_dir.iterdir():
-            dest = TOOLS_DIR / item.name
-            try:
-                if dest.exists():
-                    if dest.is_file():
-                        dest.unlink()
-                    elif dest.is_dir():
-                        shutil.rmtree(dest)
-                shutil.move(str(item), str(dest))
-            except Exception:
-                pass
-        try:
-            shutil.rmtree(extracted_dir)
-        except Exception:
-            pass
+    _extract_zip(zip_path, TOOLS_DIR, remap=_strip_prefix(SPFT_ZIP_PREFIX), manifest_name="spflashtool")
 
     if SPFT_EXE.is_file():
         log("dl.spft_ready", path=str(SPFT_EXE))
@@ -189,28 +702,47 @@ def ensure_spflashtool() -> bool:
     return False
 
 
-def ensure_prc() -> None:
+def ensure_prc() -> bool:
     lk = PRC_DIR / "lk.img"
     dtbo = PRC_DIR / "dtbo.img"
 
-    if lk.is_file() and dtbo.is_file():
+    if check_install("prc", PRC_DIR) is not False and lk.is_file() and dtbo.is_file():
         log("dl.skip_prc")
-        return
+        return True
 
     TOOLS_DIR.mkdir(parents=True, exist_ok=True)
     zip_path = TOOLS_DOWNLOAD_DIR / "PRC.zip"
 
     log("dl.prc_downloading")
-    _download_from_list(PRC_ZIP_URLS, zip_path)
+    _fetch_artifact(zip_path.name, PRC_ZIP_URLS, zip_path)
 
     log("dl.prc_extracting")
-    _extract_zip(zip_path, PRC_DIR)
+    _extract_zip(zip_path, PRC_DIR, members=PRC_MEMBERS, manifest_name="prc")
 
     if lk.is_file() and dtbo.is_file():
         log("dl.prc_ready")
-        return
+        return True
 
     log("dl.prc_missing_after_extract")
+    return False
+
+
+def ensure_tools() -> dict[str, bool]:
+    tasks: dict[str, Callable[[], object]] = {
+        "platform-tools": ensure_platform_tools,
+        "spflashtool": ensure_spflashtool,
+        "prc": ensure_prc,
+    }
+    results: dict[str, bool] = {}
+    with ThreadPoolExecutor(max_workers=len(tasks), thread_name_prefix="bootstrap") as pool:
+        futures = {name: pool.submit(fn) for name, fn in tasks.items()}
+        for name, future in futures.items():
+            try:
+                results[name] = future.result() is True
+            except Exception as e:
+                log("dl.artifact_failed", name=name, error=str(e))
+                results[name] = False
+    return results
 
 
 def ensure_cryptography() -> bool:
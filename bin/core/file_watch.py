@@ -0,0 +1,198 @@
+import fnmatch
+import os
+import select
+import struct
+import sys
+import time
+from pathlib import Path
+from typing import Callable
+
+from . import trace
+from .constants import READBACK_POLL_SEC, READBACK_SETTLE_SEC, READBACK_MTIME_SLACK_SEC, READBACK_SHARED_STABLE_SEC
+
+_IN_MODIFY = 0x00000002
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_NONBLOCK = 0o4000
+_IN_CLOEXEC = 0o2000000
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+class _Inotify:
+    def __init__(self, root: Path) -> None:
+        import ctypes
+
+        libc = ctypes.CDLL(None, use_errno=True)
+        fd = libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        mask = _IN_CREATE | _IN_MODIFY | _IN_CLOSE_WRITE | _IN_MOVED_TO
+        if libc.inotify_add_watch(fd, os.fsencode(str(root)), mask) < 0:
+            err = ctypes.get_errno()
+            os.close(fd)
+            raise OSError(err, "inotify_add_watch failed")
+        self.fd = fd
+
+    def wait(self, timeout: float | None) -> list[tuple[str, int]]:
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+        try:
+            buf = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+        events = []
+        pos = 0
+        while pos + _EVENT_HEADER.size <= len(buf):
+            _, mask, _, length = _EVENT_HEADER.unpack_from(buf, pos)
+            pos += _EVENT_HEADER.size
+            name = buf[pos : pos + length].rstrip(b"\0").decode("utf-8", "replace")
+            pos += length
+            events.append((name, mask))
+        return events
+
+    def close(self) -> None:
+        try:
+            os.close(self.fd)
+        except OSError:
+            pass
+
+
+def _open_inotify(root: Path) -> _Inotify | None:
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        return _Inotify(root)
+    except (OSError, AttributeError):
+        return None
+
+
+def open_exclusive(path: Path) -> bool:
+    if os.name == "nt":
+        try:
+            import ctypes
+
+            kernel32 = ctypes.windll.kernel32  # type: ignore[attr-defined]
+            kernel32.CreateFileW.restype = ctypes.c_void_p
+            handle = kernel32.CreateFileW(str(path), 0x80000000, 0, None, 3, 0x80, None)
+            if handle is None or handle == ctypes.c_void_p(-1).value:
+                return False
+            kernel32.CloseHandle(ctypes.c_void_p(handle))
+            return True
+        except Exception:
+            return False
+    try:
+        import fcntl
+
+        with path.open("rb") as f:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+        return True
+    except OSError:
+        return False
+
+
+def can_read_shared(path: Path) -> bool:
+    try:
+        with path.open("rb") as f:
+            f.read(1)
+        return True
+    except OSError:
+        return False
+
+
+def _scan(root: Path, pattern: str, since: float | None) -> dict[str, tuple[int, int]]:
+    found: dict[str, tuple[int, int]] = {}
+    try:
+        entries = list(os.scandir(root))
+    except OSError:
+        return found
+    for entry in entries:
+        if not fnmatch.fnmatch(entry.name, pattern):
+            continue
+        try:
+            st = entry.stat()
+        except OSError:
+            continue
+        if not entry.is_file():
+            continue
+        if since is not None and st.st_mtime < since - READBACK_MTIME_SLACK_SEC:
+            continue
+        found[entry.name] = (st.st_size, st.st_mtime_ns)
+    return found
+
+
+def wait_for_complete_file(
+    root: Path,
+    pattern: str,
+    since: float | None = None,
+    timeout: float | None = None,
+    settle_sec: float = READBACK_SETTLE_SEC,
+    is_complete: Callable[[Path], bool] = open_exclusive,
+    stable_sec: float | None = READBACK_SHARED_STABLE_SEC,
+) -> Path | None:
+    root.mkdir(parents=True, exist_ok=True)
+    with trace.span(f"wait_file {pattern}", "wait") as sp:
+        return _wait_loop(root, pattern, since, timeout, settle_sec, is_complete, stable_sec, sp)
+
+
+def _wait_loop(
+    root: Path,
+    pattern: str,
+    since: float | None,
+    timeout: float | None,
+    settle_sec: float,
+    is_complete: Callable[[Path], bool],
+    stable_sec: float | None,
+    sp: trace.Span,
+) -> Path | None:
+    watcher = _open_inotify(root)
+    sp.args["backend"] = "inotify" if watcher is not None else "poll"
+    sp.args["iterations"] = 0
+    deadline = None if timeout is None else time.monotonic() + timeout
+    seen: dict[str, tuple[tuple[int, int], float]] = {}
+    closed: set[str] = set()
+    try:
+        while True:
+            sp.args["iterations"] += 1
+            now = time.monotonic()
+            current = _scan(root, pattern, since)
+            for name, sig in current.items():
+                previous = seen.get(name)
+                if previous is None or previous[0] != sig:
+                    seen[name] = (sig, now)
+            for name in list(seen):
+                if name not in current:
+                    del seen[name]
+                    closed.discard(name)
+            settled = [
+                name for name, (sig, t) in seen.items() if sig[0] > 0 and (name in closed or now - t >= settle_sec)
+            ]
+            for name in sorted(settled, key=lambda n: seen[n][0][1], reverse=True):
+                path = root / name
+                if is_complete(path):
+                    return path
+                if stable_sec is not None and now - seen[name][1] >= stable_sec and can_read_shared(path):
+                    sp.args["stable_fallback"] = True
+                    return path
+            if deadline is not None and now >= deadline:
+                return None
+            wait = READBACK_POLL_SEC
+            if seen:
+                wait = min(wait, settle_sec)
+            if deadline is not None:
+                wait = min(wait, max(0.0, deadline - now))
+            if watcher is None:
+                time.sleep(wait)
+                continue
+            if not seen:
+                wait = None if deadline is None else max(0.0, deadline - now)
+            for name, mask in watcher.wait(wait):
+                if mask & (_IN_CLOSE_WRITE | _IN_MOVED_TO):
+                    closed.add(name)
+                elif mask & (_IN_MODIFY | _IN_CREATE):
+                    closed.discard(name)
+    finally:
+        if watcher is not None:
+            watcher.close()
@@ -1,35 +1,38 @@
 import subprocess
 from pathlib import Path
+from typing import Callable
 
-from .constants import (
-    TOOLS_DIR,
-    SPFT_EXE,
-    FLASH_XML_DLAGENT,
-    FLASH_XML_ROOT,
-    DA_AUTH_DLAGENT,
-    DA_AUTH_ROOT,
-)
-from .utils import log
+from .utils import log, log_text
+from .job import current_job
+from . import trace
+from .spft_output import SpftEvent, SpftOutputParser, iter_lines
+
+FlashEventCallback = Callable[[SpftEvent], None]
+FlashListener = Callable[[str | None, SpftEvent], None]
+
+_listeners: list[FlashListener] = []
 
 
 def _resolve_flash_xml() -> Path | None:
-    if FLASH_XML_DLAGENT.is_file():
-        return FLASH_XML_DLAGENT
-    if FLASH_XML_ROOT.is_file():
-        return FLASH_XML_ROOT
+    job = current_job()
+    if job.flash_xml_dlagent.is_file():
+        return job.flash_xml_dlagent
+    if job.flash_xml_root.is_file():
+        return job.flash_xml_root
     return None
 
 
 def _resolve_da_auth() -> Path | None:
-    if DA_AUTH_DLAGENT.is_file():
-        return DA_AUTH_DLAGENT
-    if DA_AUTH_ROOT.is_file():
-        return DA_AUTH_ROOT
+    job = current_job()
+    if job.da_auth_dlagent.is_file():
+        return job.da_auth_dlagent
+    if job.da_auth_root.is_file():
+        return job.da_auth_root
     return None
 
 
 def _update_history_ini(flash_xml: Path, da_auth: Path) -> None:
-    ini_path = TOOLS_DIR / "history.ini"
+    ini_path = current_job().history_ini
     flash_value = str(flash_xml.resolve())
     auth_value = str(da_auth.resolve())
 
@@ -70,7 +73,7 @@ def _update_history_ini(flash_xml: Path, da_auth: Path) -> None:
 
 
 def prepare_flash_files() -> bool:
-    ini_path = TOOLS_DIR / "history.ini"
+    ini_path = current_job().history_ini
     try:
         if ini_path.is_file():
             ini_path.unlink()
@@ -91,20 +94,106 @@ def prepare_flash_files() -> bool:
     return True
 
 
-def launch_spft_gui() -> None:
-    exe = SPFT_EXE
+def launch_spft_gui() -> subprocess.Popen | None:
+    job = current_job()
+    exe = job.spft_exe
     if not exe.is_file():
         log("flash.no_spft")
-        return
+        return None
     try:
-        subprocess.Popen([str(exe)], cwd=str(TOOLS_DIR))
+        proc = subprocess.Popen([str(exe)], cwd=str(job.tools_dir))
+        trace.instant("spft gui launched", "subprocess")
+        job.spft_proc = proc
         log("flash.gui_started")
+        return proc
     except Exception:
         log("flash.no_spft")
+        return None
+
 
+def _partition_sizes(image_dir: Path) -> dict[str, int]:
+    import xml.etree.ElementTree as ET
 
-def run_firmware_upgrade() -> bool:
-    exe = SPFT_EXE
+    sizes: dict[str, int] = {}
+    for scatter in image_dir.glob("*_Android_scatter.xml"):
+        try:
+            root = ET.parse(scatter).getroot()
+        except (OSError, ET.ParseError):
+            continue
+        for part in root.iter("partition_index"):
+            name = part.findtext("partition_name", "").strip()
+            file_name = part.findtext("file_name", "").strip()
+            if not name or not file_name or file_name.upper() == "NONE":
+                continue
+            try:
+                sizes[name] = (image_dir / file_name).stat().st_size
+            except OSError:
+                pass
+    return sizes
+
+
+class _ProgressReporter:
+    def __init__(self, on_event: FlashEventCallback | None) -> None:
+        self.on_event = on_event
+        self.steps: dict[str, int] = {}
+
+    def __call__(self, event: SpftEvent) -> None:
+        if self.on_event is not None:
+            try:
+                self.on_event(event)
+            except Exception:
+                pass
+        serial = current_job().serial
+        for listener in list(_listeners):
+            try:
+                listener(serial, event)
+            except Exception:
+                pass
+        if event.kind == "stage":
+            log("flash.stage", stage=event.stage)
+        elif event.kind == "error" or event.kind == "text":
+            log_text(event.text)
+        elif event.kind == "progress" and event.percent is not None:
+            step = int(event.percent) // 10
+            if self.steps.get(event.partition) == step:
+                return
+            self.steps[event.partition] = step
+            log(
+                "flash.progress",
+                partition=event.partition or "-",
+                percent=int(event.percent),
+                rate=_mb(event.rate),
+                eta=f"{event.eta:.0f}" if event.eta is not None else "?",
+            )
+        elif event.kind == "partition_done":
+            trace.instant(f"{event.partition} done", "flash", sec=f"{event.elapsed or 0:.1f}", rate=_mb(event.rate))
+            log(
+                "flash.partition_done",
+                partition=event.partition,
+                size=_mb(event.total_bytes),
+                sec=f"{event.elapsed or 0:.1f}",
+                rate=_mb(event.rate),
+            )
+
+
+def _mb(value: float | None) -> str:
+    return f"{value / 1048576:.1f}" if value else "?"
+
+
+def add_flash_listener(listener: FlashListener) -> None:
+    _listeners.append(listener)
+
+
+def remove_flash_listener(listener: FlashListener) -> None:
+    try:
+        _listeners.remove(listener)
+    except ValueError:
+        pass
+
+
+def run_firmware_upgrade(on_event: FlashEventCallback | None = None) -> bool:
+    job = current_job()
+    exe = job.spft_exe
     if not exe.is_file():
         log("flash.no_spft")
         return False
@@ -119,19 +208,9 @@ def run_firmware_upgrade() -> bool:
         log("flow.no_da_auth")
         return False
 
+    cmd = [str(exe), "-a", str(da_auth), "-f", str(flash_xml), "-c", "download"]
     try:
-        result = subprocess.run(
-            [
-                str(exe),
-                "-a",
-                str(da_auth),
-                "-f",
-                str(flash_xml),
-                "-c",
-                "download",
-            ],
-            cwd=str(TOOLS_DIR),
-        )
+        proc = subprocess.Popen(cmd, cwd=str(job.tools_dir), stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
     except FileNotFoundError:
         log("flash.no_spft")
         return False
@@ -139,9 +218,22 @@ def run_firmware_upgrade() -> bool:
         log("flash.failed", code=-1)
         return False
 
-    if result.returncode == 0:
+    parser = SpftOutputParser(_partition_sizes(job.image_dir))
+    reporter = _ProgressReporter(on_event)
+    with trace.span("spft download", "subprocess") as sp:
+        try:
+            for line in iter_lines(proc.stdout):
+                for event in parser.feed(line):
+                    reporter(event)
+            for event in parser.finish():
+                reporter(event)
+        finally:
+            returncode = proc.wait()
+            sp.args["returncode"] = returncode
+
+    if returncode == 0:
         log("flash.done")
         return True
 
-    log("flash.failed", code=result.returncode)
+    log("flash.failed", code=returncode)
     return False
@@ -0,0 +1,234 @@
+import os
+import shutil
+import time
+
+from .utils import log, wait_for_device, adb_reboot
+from .scatter import prepare_platform_scatter
+from .flash_spft import prepare_flash_files, launch_spft_gui, run_firmware_upgrade
+from .proinfo_country import wait_and_patch_proinfo
+from .port_scan import wait_for_preloader
+from .constants import (
+    PRC_DIR,
+    UNATTENDED_DEVICE_TIMEOUT_SEC,
+    UNATTENDED_READBACK_TIMEOUT_SEC,
+    UNATTENDED_PRELOADER_TIMEOUT_SEC,
+)
+from .device_snapshot import get_device_snapshot
+from .job import current_job
+from .pipeline import Step, StepError
+from .readiness import wait_ready, files_present, process_window_ready
+
+
+def _cleanup_before_flow() -> None:
+    job = current_job()
+    try:
+        if job.image_dir.is_dir():
+            for entry in job.image_dir.iterdir():
+                if not entry.is_file():
+                    continue
+                name = entry.name.lower()
+                if name.endswith("_android_scatter.xml") or name in (
+                    "android_scatter.xml",
+                    "android_scatter_a,b.xml",
+                ) or name == "proinfo":
+                    try:
+                        entry.unlink()
+                    except Exception:
+                        pass
+    except Exception:
+        pass
+    try:
+        if job.readback_dir.is_dir():
+            for entry in job.readback_dir.iterdir():
+                if entry.is_file() and "proinfo" in entry.name.lower():
+                    try:
+                        entry.unlink()
+                    except Exception:
+                        pass
+    except Exception:
+        pass
+    try:
+        history = job.history_ini
+        if history.is_file():
+            history.unlink()
+    except Exception:
+        pass
+
+
+def _cleanup_after_flow(platform: str) -> None:
+    try:
+        final_scatter = current_job().image_dir / f"{platform}_Android_scatter.xml"
+        if final_scatter.is_file():
+            try:
+                final_scatter.unlink()
+            except Exception:
+                pass
+    except Exception:
+        pass
+    _cleanup_before_flow()
+
+
+def _detect_platform() -> str:
+    log("flow.detect_platform")
+    platform = get_device_snapshot().platform
+    if not platform:
+        log("flow.not_mtk", platform="")
+        return ""
+    if not platform.startswith("MT"):
+        log("flow.not_mtk", platform=platform)
+        return ""
+    log("flow.platform", platform=platform)
+    return platform
+
+
+def _check_flash_xml_platform(platform: str) -> bool:
+    job = current_job()
+    flash_xml = job.flash_xml_dlagent if job.flash_xml_dlagent.is_file() else job.flash_xml_root
+    if not flash_xml.is_file():
+        log("flow.no_flash_xml")
+        return False
+
+    try:
+        text = flash_xml.read_text(encoding="utf-8", errors="ignore")
+    except Exception:
+        log("flow.no_flash_xml")
+        return False
+
+    expected = platform
+    if expected and expected not in text:
+        log("flow.flash_xml_mismatch", platform=platform, expected=expected, path=str(flash_xml))
+        return False
+    return True
+
+
+def _replace_prc_images() -> None:
+    image_dir = current_job().image_dir
+    if not image_dir.is_dir() or not PRC_DIR.is_dir():
+        return
+    for fname in ("lk.img", "dtbo.img"):
+        src = PRC_DIR / fname
+        if not src.is_file():
+            continue
+        dst = image_dir / fname
+        tmp = dst.with_name(dst.name + ".part")
+        try:
+            shutil.copy2(src, tmp)
+            os.replace(tmp, dst)
+        except Exception:
+            try:
+                tmp.unlink()
+            except OSError:
+                pass
+
+
+def _unattended_limit(seconds: float) -> float | None:
+    return seconds if current_job().unattended else None
+
+
+def wait_device_step(name: str = "wait_device", required: bool = True) -> Step:
+    def run(ctx: dict):
+        ok = wait_for_device(_unattended_limit(UNATTENDED_DEVICE_TIMEOUT_SEC))
+        return ok if required else None
+
+    return Step(name, run)
+
+
+def _device_info(ctx: dict):
+    log("flow.device_info_check")
+    snapshot = get_device_snapshot(refresh=True)
+    log("flow.device_info", hw=snapshot.hw_version, cpu=snapshot.cpuinfo)
+    if not snapshot.props:
+        raise StepError("getprop returned no properties")
+    return {"snapshot": snapshot}
+
+
+def device_info_step() -> Step:
+    return Step("device_info", _device_info, provides=("snapshot",), retries=2, optional=True)
+
+
+def _detect_platform_run(ctx: dict):
+    platform = _detect_platform()
+    if not platform:
+        return False
+    return {"platform": platform}
+
+
+def detect_platform_step() -> Step:
+    return Step("detect_platform", _detect_platform_run, provides=("platform",))
+
+
+def prepare_scatter_step(variant: str = "global") -> Step:
+    def run(ctx: dict):
+        scatter = prepare_platform_scatter(ctx["platform"], variant)
+        if scatter is None:
+            return False
+        return {"scatter": scatter}
+
+    return Step("prepare_scatter", run, requires=("platform",), provides=("scatter",))
+
+
+def check_flash_xml_step() -> Step:
+    def run(ctx: dict):
+        return _check_flash_xml_platform(ctx["platform"])
+
+    return Step("check_flash_xml", run, requires=("platform",), after=())
+
+
+def stage_prc_images_step() -> Step:
+    def run(ctx: dict):
+        wait_ready("prc_images", files_present(PRC_DIR / "lk.img", PRC_DIR / "dtbo.img"), 5)
+        _replace_prc_images()
+
+    return Step(
+        "stage_prc_images",
+        run,
+        requires=("platform",),
+        after=("check_flash_xml",),
+        skip_if=lambda ctx: not PRC_DIR.is_dir(),
+        optional=True,
+    )
+
+
+def prepare_flash_files_step(after: tuple[str, ...]) -> Step:
+    return Step("prepare_flash_files", lambda ctx: prepare_flash_files(), after=after)
+
+
+def launch_spft_step() -> Step:
+    def run(ctx: dict):
+        started = time.time()
+        proc = launch_spft_gui()
+        if proc is None:
+            return False
+        wait_ready("spft_window", process_window_ready(proc), 5)
+        return {"spft_started": started}
+
+    return Step("launch_spft", run, provides=("spft_started",))
+
+
+def readback_step() -> Step:
+    def run(ctx: dict):
+        timeout = _unattended_limit(UNATTENDED_READBACK_TIMEOUT_SEC)
+        if not wait_and_patch_proinfo(ctx["platform"], since=ctx.get("spft_started"), timeout=timeout):
+            return False
+
+    return Step("readback", run, requires=("platform",))
+
+
+def reboot_and_flash_step() -> Step:
+    def run(ctx: dict):
+        with current_job().flash_slot():
+            log("flow.rebooting")
+            adb_reboot()
+            if wait_for_preloader(_unattended_limit(UNATTENDED_PRELOADER_TIMEOUT_SEC)) is None:
+                log("preloader.timeout")
+                return False
+            return run_firmware_upgrade()
+
+    return Step("reboot_and_flash", run)
+
+
+def cleanup_after_step() -> Step:
+    def run(ctx: dict):
+        _cleanup_after_flow(ctx["platform"])
+
+    return Step("cleanup_after", run, requires=("platform",))
@@ -1,33 +1,106 @@
 import json
+import marshal
+import os
+import string
 import threading
 from pathlib import Path
+from types import MappingProxyType
+from typing import Mapping
 
 _lang_lock = threading.Lock()
 _current_lang = "en"
 _fallback_lang = "en"
-_lang_data = {}
 _lang_dir = Path(__file__).resolve().parent / "lang"
+_cache_dir = Path(__file__).resolve().parent / "__pycache__"
+_CATALOG_VERSION = 1
 
+Template = tuple[tuple[str, str | None, str, str | None], ...]
 
-def _load_lang(code: str) -> None:
-    global _lang_data
-    data = {}
-    fallback_path = _lang_dir / f"{_fallback_lang}.json"
-    if fallback_path.is_file():
+_EMPTY: Mapping = MappingProxyType({})
+_catalog: tuple[Mapping[str, str], Mapping[str, Template]] = (_EMPTY, _EMPTY)
+_catalog_sig: tuple = ()
+_formatter = string.Formatter()
+
+
+def _source_paths(code: str) -> list[Path]:
+    paths = [_lang_dir / f"{_fallback_lang}.json"]
+    if code != _fallback_lang:
+        paths.append(_lang_dir / f"{code}.json")
+    return paths
+
+
+def _signature(code: str) -> tuple:
+    sig: list = [_CATALOG_VERSION, code]
+    for path in _source_paths(code):
         try:
-            with fallback_path.open("r", encoding="utf-8") as f:
+            st = path.stat()
+            sig.append((path.name, st.st_mtime_ns, st.st_size))
+        except OSError:
+            sig.append((path.name, 0, 0))
+    return tuple(sig)
+
+
+def _parse_template(text: str) -> Template | None:
+    try:
+        parts = tuple(_formatter.parse(text))
+    except ValueError:
+        return None
+    for _, field, spec, _ in parts:
+        if field is not None and (not field or not field.isidentifier()):
+            return None
+        if spec and "{" in spec:
+            return None
+    return tuple((literal, field, spec or "", conv) for literal, field, spec, conv in parts)
+
+
+def _compile(code: str) -> tuple[dict[str, str], dict[str, Template]]:
+    data: dict[str, str] = {}
+    for i, path in enumerate(_source_paths(code)):
+        if not path.is_file():
+            continue
+        try:
+            with path.open("r", encoding="utf-8") as f:
                 data.update(json.load(f))
         except Exception:
-            data = {}
-    if code != _fallback_lang:
-        lang_path = _lang_dir / f"{code}.json"
-        if lang_path.is_file():
-            try:
-                with lang_path.open("r", encoding="utf-8") as f:
-                    data.update(json.load(f))
-            except Exception:
-                pass
-    _lang_data = data
+            if i == 0:
+                data = {}
+    templates: dict[str, Template] = {}
+    for key, value in data.items():
+        if "{" not in value:
+            continue
+        parsed = _parse_template(value)
+        if parsed is not None:
+            templates[key] = parsed
+    return data, templates
+
+
+def _load_catalog(code: str, sig: tuple) -> tuple[dict[str, str], dict[str, Template]]:
+    cache = _cache_dir / f"lang_{code}.catalog"
+    try:
+        cached_sig, data, templates = marshal.loads(cache.read_bytes())
+        if cached_sig == sig:
+            return data, templates
+    except Exception:
+        pass
+    data, templates = _compile(code)
+    try:
+        _cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp = cache.with_name(f"{cache.name}.{os.getpid()}.tmp")
+        tmp.write_bytes(marshal.dumps((sig, data, templates)))
+        os.replace(tmp, cache)
+    except Exception:
+        pass
+    return data, templates
+
+
+def _load_lang(code: str) -> None:
+    global _catalog, _catalog_sig
+    sig = _signature(code)
+    if sig == _catalog_sig:
+        return
+    data, templates = _load_catalog(code, sig)
+    _catalog = (MappingProxyType(data), MappingProxyType(templates))
+    _catalog_sig = sig
 
 
 def set_language(code: str) -> None:
@@ -46,14 +119,48 @@ def get_language() -> str:
     return _current_lang
 
 
-def get_string(key: str) -> str:
+def _ensure_loaded() -> tuple[Mapping[str, str], Mapping[str, Template]]:
     with _lang_lock:
-        data = _lang_data
-        lang = _current_lang
-    if not data:
-        _load_lang(lang)
-        data = _lang_data
+        if not _catalog[0]:
+            _load_lang(_current_lang)
+    return _catalog
+
+
+def get_string(key: str) -> str:
+    data = _catalog[0] or _ensure_loaded()[0]
     value = data.get(key)
     if value is None:
         return key
     return value
+
+
+def format_string(key: str, **kwargs) -> str:
+    catalog = _catalog
+    if not catalog[0]:
+        catalog = _ensure_loaded()
+    data, templates = catalog
+    value = data.get(key)
+    if value is None:
+        return key
+    if not kwargs:
+        return value
+    template = templates.get(key)
+    try:
+        if template is None:
+            return value.format(**kwargs)
+        out: list[str] = []
+        for literal, field, spec, conv in template:
+            out.append(literal)
+            if field is None:
+                continue
+            item = kwargs[field]
+            if conv == "r":
+                item = repr(item)
+            elif conv == "s":
+                item = str(item)
+            elif conv == "a":
+                item = ascii(item)
+            out.append(format(item, spec))
+        return "".join(out)
+    except Exception:
+        return value
@@ -0,0 +1,63 @@
+import argparse
+import os
+import subprocess
+import sys
+
+from .constants import BIN_DIR, IMPORT_BUDGET_MS, IMPORT_BUDGET_FORBIDDEN
+
+
+def measure() -> tuple[float, dict[str, float]]:
+    env = os.environ.copy()
+    env["PYTHONPATH"] = str(BIN_DIR)
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+    cmd = [sys.executable, "-X", "importtime", "-m", "core.bootstrap", "--help"]
+    proc = subprocess.run(cmd, env=env, cwd=str(BIN_DIR), capture_output=True, text=True, errors="replace")
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip() or f"exit code {proc.returncode}")
+    total = 0.0
+    modules: dict[str, float] = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3 or not parts[1].strip().isdigit():
+            continue
+        name = parts[2][1:]
+        cumulative = int(parts[1]) / 1000.0
+        modules[name.strip()] = cumulative
+        if not name.startswith(" "):
+            total += cumulative
+    return total, modules
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(prog="core.import_budget", description="Check startup import time of core.bootstrap")
+    parser.add_argument("--budget-ms", type=float, default=IMPORT_BUDGET_MS)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    best: tuple[float, dict[str, float]] | None = None
+    for _ in range(max(1, args.runs)):
+        total, modules = measure()
+        if best is None or total < best[0]:
+            best = (total, modules)
+    total, modules = best
+
+    print(f"startup imports: {total:.1f} ms (budget {args.budget_ms:.0f} ms, best of {max(1, args.runs)})")
+    for name, ms in sorted(modules.items(), key=lambda item: item[1], reverse=True)[: args.top]:
+        print(f"  {ms:8.1f} ms  {name}")
+
+    failed = False
+    eager = [name for name in IMPORT_BUDGET_FORBIDDEN if name in modules]
+    if eager:
+        print("imported at startup but should be lazy: " + ", ".join(eager))
+        failed = True
+    if total > args.budget_ms:
+        print(f"over budget by {total - args.budget_ms:.1f} ms")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+import contextlib
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterator
+
+from .constants import IMAGE_DIR, TOOLS_DIR, SPFT_EXE
+from . import trace
+
+_local = threading.local()
+
+
+@dataclass
+class Job:
+    serial: str | None = None
+    workspace: Path | None = None
+    flash_lock: threading.Semaphore | None = None
+    console_lock: threading.RLock | None = None
+    spft_proc: object | None = field(default=None, repr=False)
+    unattended: bool = False
+    country: str | None = None
+
+    @property
+    def isolated(self) -> bool:
+        return self.workspace is not None
+
+    @property
+    def image_dir(self) -> Path:
+        return self.workspace / "image" if self.workspace is not None else IMAGE_DIR
+
+    @property
+    def tools_dir(self) -> Path:
+        return self.workspace / "tools" if self.workspace is not None else TOOLS_DIR
+
+    @property
+    def readback_dir(self) -> Path:
+        return self.tools_dir / "Readback"
+
+    @property
+    def history_ini(self) -> Path:
+        return self.tools_dir / "history.ini"
+
+    @property
+    def spft_exe(self) -> Path:
+        return self.tools_dir / SPFT_EXE.name
+
+    @property
+    def flash_xml_dlagent(self) -> Path:
+        return self.image_dir / "download_agent" / "flash.xml"
+
+    @property
+    def flash_xml_root(self) -> Path:
+        return self.image_dir / "flash.xml"
+
+    @property
+    def da_auth_dlagent(self) -> Path:
+        return self.image_dir / "download_agent" / "da.auth"
+
+    @property
+    def da_auth_root(self) -> Path:
+        return self.image_dir / "da.auth"
+
+    @contextlib.contextmanager
+    def flash_slot(self) -> Iterator[None]:
+        if self.flash_lock is None:
+            yield
+            return
+        with self.flash_lock:
+            yield
+
+    @contextlib.contextmanager
+    def console(self) -> Iterator[None]:
+        if self.console_lock is None:
+            yield
+            return
+        with self.console_lock:
+            yield
+
+    def prompt(self, text: str) -> str:
+        if self.unattended:
+            raise EOFError(text)
+        with trace.span("operator prompt", "operator"):
+            if self.console_lock is None:
+                return input(text)
+            with self.console_lock:
+                return input(f"[{self.serial}] {text}")
+
+
+_default_job = Job()
+
+
+def current_job() -> Job:
+    return getattr(_local, "job", None) or _default_job
+
+
+@contextlib.contextmanager
+def job_context(job: Job) -> Iterator[Job]:
+    previous = getattr(_local, "job", None)
+    _local.job = job
+    try:
+        yield job
+    finally:
+        _local.job = previous
@@ -0,0 +1,150 @@
+import atexit
+import json
+import queue
+import sys
+import threading
+from pathlib import Path
+
+from .constants import LOG_QUEUE_MAX, LOG_FLUSH_SEC, LOG_BATCH_MAX
+
+_STOP = object()
+
+
+class LogWriter:
+    def __init__(self, path: Path, jsonl_path: Path | None = None) -> None:
+        self.path = path
+        self.jsonl_path = jsonl_path
+        self._queue: queue.Queue = queue.Queue(LOG_QUEUE_MAX)
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, line: str, record: dict | None = None) -> None:
+        if self._closed:
+            self._write_direct(line, record)
+            return
+        self._queue.put((line, record))
+
+    def _write_direct(self, line: str, record: dict | None) -> None:
+        try:
+            with self.path.open("a", encoding="utf-8") as f:
+                f.write(line + "\n")
+            if self.jsonl_path is not None and record is not None:
+                with self.jsonl_path.open("a", encoding="utf-8") as f:
+                    f.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+        except Exception:
+            pass
+
+    def _open(self, path: Path | None):
+        if path is None:
+            return None
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            return path.open("a", encoding="utf-8")
+        except OSError:
+            return None
+
+    def _run(self) -> None:
+        text_file = self._open(self.path)
+        json_file = self._open(self.jsonl_path)
+        stop = False
+        try:
+            while not stop:
+                try:
+                    items = [self._queue.get(timeout=LOG_FLUSH_SEC)]
+                except queue.Empty:
+                    continue
+                while len(items) < LOG_BATCH_MAX:
+                    try:
+                        items.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                lines: list[str] = []
+                records: list[str] = []
+                for item in items:
+                    if item is _STOP:
+                        stop = True
+                        continue
+                    if isinstance(item, threading.Event):
+                        continue
+                    line, record = item
+                    lines.append(line + "\n")
+                    if record is not None and json_file is not None:
+                        records.append(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+                try:
+                    if text_file is not None and lines:
+                        text_file.writelines(lines)
+                        text_file.flush()
+                    if json_file is not None and records:
+                        json_file.writelines(records)
+                        json_file.flush()
+                except Exception:
+                    pass
+                for item in items:
+                    if isinstance(item, threading.Event):
+                        item.set()
+                    self._queue.task_done()
+        finally:
+            for f in (text_file, json_file):
+                if f is not None:
+                    try:
+                        f.close()
+                    except Exception:
+                        pass
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        if self._closed or not self._thread.is_alive():
+            return True
+        done = threading.Event()
+        try:
+            self._queue.put(done, timeout=timeout)
+        except queue.Full:
+            return False
+        return done.wait(timeout)
+
+    def close(self, timeout: float = 5.0) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        if self._thread.is_alive():
+            try:
+                self._queue.put(_STOP, timeout=timeout)
+            except queue.Full:
+                return
+            self._thread.join(timeout)
+
+
+_writer: LogWriter | None = None
+_writer_lock = threading.Lock()
+
+
+def get_writer(path: Path, jsonl_path: Path | None = None) -> LogWriter:
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = LogWriter(path, jsonl_path)
+            atexit.register(_writer.close)
+            _install_crash_hooks()
+        return _writer
+
+
+def flush_logs(timeout: float = 5.0) -> None:
+    writer = _writer
+    if writer is not None:
+        writer.flush(timeout)
+
+
+def _install_crash_hooks() -> None:
+    previous_excepthook = sys.excepthook
+    previous_thread_hook = threading.excepthook
+
+    def excepthook(*args) -> None:
+        flush_logs()
+        previous_excepthook(*args)
+
+    def thread_hook(args) -> None:
+        flush_logs()
+        previous_thread_hook(args)
+
+    sys.excepthook = excepthook
+    threading.excepthook = thread_hook
@@ -0,0 +1,88 @@
+import json
+import os
+import threading
+import time
+from urllib.parse import urlsplit
+
+from .constants import MIRROR_STATS_FILE, MIRROR_STATS_TTL_SEC
+from .file_lock import locked
+
+_lock = threading.Lock()
+_EWMA = 0.5
+
+
+def mirror_label(url: str) -> str:
+    parts = urlsplit(url)
+    return parts.netloc or url
+
+
+def _load() -> dict[str, dict]:
+    try:
+        data = json.loads(MIRROR_STATS_FILE.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def _save(data: dict[str, dict]) -> None:
+    try:
+        MIRROR_STATS_FILE.parent.mkdir(parents=True, exist_ok=True)
+        tmp = MIRROR_STATS_FILE.with_name(f"{MIRROR_STATS_FILE.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_text(json.dumps(data, indent=2), encoding="utf-8")
+        os.replace(tmp, MIRROR_STATS_FILE)
+    except OSError:
+        pass
+
+
+def load_stats(urls: list[str]) -> dict[str, dict]:
+    with _lock:
+        data = _load()
+    return {url: data[url] for url in urls if isinstance(data.get(url), dict)}
+
+
+def is_fresh(stats: dict[str, dict], urls: list[str]) -> bool:
+    now = time.time()
+    for url in urls:
+        entry = stats.get(url)
+        if entry is None or entry.get("failures"):
+            return False
+        if now - entry.get("updated", 0) > MIRROR_STATS_TTL_SEC:
+            return False
+    return True
+
+
+def record(url: str, ttfb: float | None = None, rate: float | None = None, failed: bool = False) -> None:
+    try:
+        with _lock, locked(MIRROR_STATS_FILE.with_name(MIRROR_STATS_FILE.name + ".lock")):
+            _record(url, ttfb, rate, failed)
+    except OSError:
+        pass
+
+
+def _record(url: str, ttfb: float | None, rate: float | None, failed: bool) -> None:
+    data = _load()
+    entry = data.get(url)
+    if not isinstance(entry, dict):
+        entry = {}
+    if ttfb is not None:
+        old = entry.get("ttfb")
+        entry["ttfb"] = ttfb if old is None else old * (1 - _EWMA) + ttfb * _EWMA
+    if rate is not None:
+        old = entry.get("rate")
+        entry["rate"] = rate if old is None else old * (1 - _EWMA) + rate * _EWMA
+    entry["failures"] = entry.get("failures", 0) + 1 if failed else 0
+    entry["updated"] = time.time()
+    data[url] = entry
+    _save(data)
+
+
+def rank(urls: list[str], stats: dict[str, dict]) -> list[str]:
+    def key(item: tuple[int, str]) -> tuple:
+        index, url = item
+        entry = stats.get(url) or {}
+        rate = entry.get("rate")
+        if entry.get("failures") or rate is None:
+            return (1, entry.get("failures", 0), index)
+        return (0, -rate, entry.get("ttfb") or 0.0, index)
+
+    return [url for _, url in sorted(enumerate(urls), key=key)]
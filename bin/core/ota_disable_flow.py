@@ -1,5 +1,6 @@
 from .i18n import get_string
 from .utils import log, wait_for_device, run_adb, kill_adb_server
+from . import trace
 
 
 def _apply_ota_settings() -> None:
@@ -31,6 +32,11 @@ def _uninstall_ota_packages() -> None:
 
 
 def run_ota_disable_flow() -> None:
+    with trace.trace_session("ota_disable"):
+        _run_ota_disable_flow()
+
+
+def _run_ota_disable_flow() -> None:
     separator = get_string("app.menu.separator")
 
     print(separator)
@@ -48,8 +54,10 @@ def run_ota_disable_flow() -> None:
     log("ota.disabling")
 
     try:
-        _apply_ota_settings()
-        _uninstall_ota_packages()
+        with trace.span("apply_ota_settings"):
+            _apply_ota_settings()
+        with trace.span("uninstall_ota_packages"):
+            _uninstall_ota_packages()
     finally:
         kill_adb_server()
 
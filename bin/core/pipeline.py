@@ -0,0 +1,143 @@
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Callable
+
+from .job import current_job, job_context
+from .utils import log
+from . import trace
+
+StepResult = dict | bool | None
+
+
+class StepError(Exception):
+    pass
+
+
+@dataclass
+class Step:
+    name: str
+    run: Callable[[dict], StepResult]
+    requires: tuple[str, ...] = ()
+    provides: tuple[str, ...] = ()
+    after: tuple[str, ...] | None = None
+    retries: int = 0
+    retry_delay: float = 1.0
+    skip_if: Callable[[dict], bool] | None = None
+    optional: bool = False
+
+
+@dataclass
+class PipelineResult:
+    ok: bool = True
+    failed_step: str | None = None
+    timings: dict[str, float] = field(default_factory=dict)
+    skipped: list[str] = field(default_factory=list)
+    context: dict = field(default_factory=dict)
+
+
+def _dependencies(steps: list[Step]) -> dict[str, set[str]]:
+    providers: dict[str, str] = {}
+    for step in steps:
+        for key in step.provides:
+            providers[key] = step.name
+    deps: dict[str, set[str]] = {}
+    previous: str | None = None
+    for step in steps:
+        if step.after is None:
+            names = {previous} if previous else set()
+        else:
+            names = set(step.after)
+        for key in step.requires:
+            if key in providers:
+                names.add(providers[key])
+        deps[step.name] = names
+        previous = step.name
+    return deps
+
+
+def _run_step(step: Step, ctx: dict, lock: threading.Lock) -> StepResult:
+    with trace.span(step.name, "step") as sp:
+        return _run_step_attempts(step, ctx, lock, sp)
+
+
+def _run_step_attempts(step: Step, ctx: dict, lock: threading.Lock, sp: trace.Span) -> StepResult:
+    attempt = 0
+    while True:
+        sp.args["attempt"] = attempt + 1
+        try:
+            with lock:
+                view = dict(ctx)
+            return step.run(view)
+        except StepError as e:
+            if attempt >= step.retries:
+                log("pipeline.step_error", step=step.name, error=str(e))
+                return None if step.optional else False
+        except Exception:
+            if attempt >= step.retries:
+                raise
+        attempt += 1
+        log("pipeline.step_retry", step=step.name, attempt=attempt, retries=step.retries)
+        trace.sleep(step.retry_delay, "retry_delay")
+
+
+def run_pipeline(name: str, steps: list[Step], ctx: dict | None = None, max_workers: int = 2) -> PipelineResult:
+    result = PipelineResult(context=dict(ctx or {}))
+    deps = _dependencies(steps)
+    by_name = {step.name: step for step in steps}
+    pending = [step.name for step in steps]
+    done: set[str] = set()
+    running: dict[Future, tuple[str, float]] = {}
+    lock = threading.Lock()
+    job = current_job()
+    started = time.monotonic()
+
+    def call(step: Step) -> StepResult:
+        with job_context(job):
+            return _run_step(step, result.context, lock)
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"pipeline-{name}") as pool:
+        while pending or running:
+            if result.ok:
+                for step_name in list(pending):
+                    if not deps[step_name] <= done:
+                        continue
+                    step = by_name[step_name]
+                    pending.remove(step_name)
+                    if step.skip_if is not None and step.skip_if(dict(result.context)):
+                        trace.instant(f"{step_name} skipped", "step")
+                        result.skipped.append(step_name)
+                        result.timings[step_name] = 0.0
+                        done.add(step_name)
+                        log("pipeline.step_skipped", step=step_name)
+                        continue
+                    running[pool.submit(call, step)] = (step_name, time.monotonic())
+            else:
+                pending.clear()
+            if not running:
+                if pending and result.ok:
+                    result.ok = False
+                    result.failed_step = pending[0]
+                    pending.clear()
+                continue
+            finished, _ = wait(list(running), return_when=FIRST_COMPLETED)
+            for future in finished:
+                step_name, t0 = running.pop(future)
+                result.timings[step_name] = time.monotonic() - t0
+                outcome = future.result()
+                if outcome is False:
+                    if result.ok:
+                        result.ok = False
+                        result.failed_step = step_name
+                    continue
+                if isinstance(outcome, dict):
+                    with lock:
+                        result.context.update(outcome)
+                done.add(step_name)
+
+    total = time.monotonic() - started
+    for step_name in [s.name for s in steps if s.name in result.timings]:
+        log("pipeline.step_time", step=step_name, sec=f"{result.timings[step_name]:.2f}")
+    log("pipeline.total_time", name=name, sec=f"{total:.2f}")
+    return result
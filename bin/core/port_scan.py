@@ -1,30 +1,24 @@
-import subprocess
-import time
-
+from .constants import PRELOADER_VID, PRELOADER_PID, PRELOADER_NAME_HINTS
+from .usb_backend import UsbBackend, UsbDevice, get_usb_backend
 from .utils import log
 
 
-def wait_for_preloader() -> None:
+def is_preloader(dev: UsbDevice) -> bool:
+    if dev.vid == PRELOADER_VID and dev.pid == PRELOADER_PID:
+        return True
+    name = dev.name.lower()
+    return any(hint in name for hint in PRELOADER_NAME_HINTS)
+
+
+def wait_for_preloader(timeout: float | None = None, backend: UsbBackend | None = None) -> UsbDevice | None:
     log("preloader.waiting")
-    while True:
-        try:
-            cmd = [
-                "powershell",
-                "-NoProfile",
-                "-Command",
-                "(Get-PnpDevice -Status OK | Where-Object { $_.FriendlyName -like '*PreLoader*' -or $_.FriendlyName -like '*Preloader*' -or $_.FriendlyName -like '*MediaTek USB Port*' } | Select-Object -First 1).FriendlyName",
-            ]
-            result = subprocess.run(
-                cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.DEVNULL,
-                text=True,
-                encoding="utf-8",
-                errors="ignore",
-            )
-            name = (result.stdout or "").strip()
-            if name:
-                log("preloader.detected", name=name)
-                return
-        except Exception:
-            pass
+    owned = backend is None
+    backend = backend or get_usb_backend()
+    try:
+        dev = backend.wait_for(is_preloader, timeout)
+    finally:
+        if owned:
+            backend.close()
+    if dev is not None:
+        log("preloader.detected", name=dev.name or f"{dev.vid}:{dev.pid}")
+    return dev
@@ -1,10 +1,17 @@
+import mmap
+import os
+import re
+import shutil
 import time
 import subprocess
 from pathlib import Path
 
-from .constants import READBACK_DIR, IMAGE_DIR, SPFT_EXE
+from .constants import SPFT_EXE, READBACK_TIMEOUT_SEC
 from .utils import log, log_text
 from .i18n import get_string
+from .file_watch import wait_for_complete_file
+from .job import current_job
+from . import trace
 
 COUNTRIES: list[tuple[str, str]] = [
     ("Argentina", "AR"),
@@ -99,31 +106,69 @@ COUNTRIES: list[tuple[str, str]] = [
 ]
 
 
-def _detect_current_code(data: bytes) -> str:
-    for _, code in COUNTRIES:
-        token = (code + "XX").encode("ascii")
-        idx = data.find(token)
-        if idx != -1:
-            return code + "XX"
-    idx = data.find(b"CNXX")
-    if idx != -1:
-        return "CNXX"
-    return ""
+_CODE_PATTERN = re.compile(b"(?:" + b"|".join(code.encode("ascii") for _, code in COUNTRIES) + b")XX")
 
 
-def _patch_country(data: bytes, new_code: str) -> bytes:
+def find_country_codes(data) -> list[tuple[int, str]]:
+    return [(m.start(), m.group().decode("ascii")) for m in _CODE_PATTERN.finditer(data)]
+
+
+def _detect_current_code(data) -> str:
+    matches = find_country_codes(data)
+    return matches[0][1] if matches else ""
+
+
+_FICLONE = 0x40049409
+
+
+def _clone_file(src: Path, dst: Path) -> None:
+    if os.name != "nt":
+        try:
+            import fcntl
+
+            with src.open("rb") as fsrc, dst.open("wb") as fdst:
+                fcntl.ioctl(fdst.fileno(), _FICLONE, fsrc.fileno())
+            return
+        except (ImportError, OSError):
+            pass
+    shutil.copyfile(src, dst)
+
+
+def _patch_country(path: Path, new_code: str, strict: bool = False) -> bool:
     token_new = (new_code + "XX").encode("ascii")
-    for _, code in COUNTRIES:
-        token_old = (code + "XX").encode("ascii")
-        idx = data.find(token_old)
-        if idx != -1:
-            if len(token_old) != len(token_new):
-                return data
-            return data[:idx] + token_new + data[idx + len(token_old) :]
-    idx = data.find(b"CNXX")
-    if idx != -1 and len(token_new) == 4:
-        return data[:idx] + token_new + data[idx + 4 :]
-    return data
+    if len(token_new) != 4:
+        return False
+    with path.open("r+b") as f, mmap.mmap(f.fileno(), 0) as mm:
+        matches = find_country_codes(mm)
+        if not matches:
+            return False
+        if len(matches) > 1:
+            candidates = ", ".join(f"{code}@0x{idx:x}" for idx, code in matches)
+            if strict:
+                log("country.ambiguous_refused", candidates=candidates)
+                return False
+            log("country.ambiguous", candidates=candidates)
+        idx = matches[0][0]
+        mm[idx : idx + 4] = token_new
+        mm.flush()
+    return True
+
+
+def _stage_proinfo(src: Path, dst: Path, new_code: str, strict: bool = False) -> bool:
+    tmp = dst.with_name(dst.name + ".part")
+    try:
+        _clone_file(src, tmp)
+        if new_code and not _patch_country(tmp, new_code, strict) and strict:
+            tmp.unlink()
+            return False
+        os.replace(tmp, dst)
+    except BaseException:
+        try:
+            tmp.unlink()
+        except OSError:
+            pass
+        raise
+    return True
 
 
 def _print_country_menu() -> None:
@@ -149,7 +194,7 @@ def _select_country() -> str:
     _print_country_menu()
     while True:
         try:
-            raw = input(get_string("country.number_prompt"))
+            raw = current_job().prompt(get_string("country.number_prompt"))
         except EOFError:
             return ""
         choice = raw.strip()
@@ -167,80 +212,92 @@ def _select_country() -> str:
         return code
 
 
-def wait_and_patch_proinfo(platform: str) -> None:
-    READBACK_DIR.mkdir(parents=True, exist_ok=True)
-    log("flow.wait_proinfo")
-
-    proinfo_path: Path | None = None
-    while proinfo_path is None:
-        files = list(READBACK_DIR.glob("proinfo*"))
-        if files:
-            proinfo_path = max(files, key=lambda p: p.stat().st_mtime)
-            break
-        time.sleep(3)
-
-    time.sleep(7)
-
-    data: bytes | None = None
-    while True:
-        try:
-            data = proinfo_path.read_bytes()  # type: ignore[arg-type]
-            break
-        except PermissionError:
-            time.sleep(1)
-        except Exception:
-            data = None
-            break
-
-    if data is None:
-        log("country.no_file")
+def _close_spft(job) -> None:
+    if job.isolated:
+        proc = job.spft_proc
+        if proc is not None:
+            try:
+                proc.kill()
+            except Exception:
+                pass
         return
-
-    log("country.detecting")
-
     try:
         exe_name = SPFT_EXE.name
     except Exception:
         exe_name = "SPFlashToolV6.exe"
     try:
-        subprocess.run(
-            ["taskkill", "/f", "/im", exe_name],
-            stdout=subprocess.DEVNULL,
-            stderr=subprocess.DEVNULL,
-            check=False,
-        )
+        with trace.span("taskkill", "subprocess"):
+            subprocess.run(
+                ["taskkill", "/f", "/im", exe_name],
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                check=False,
+            )
     except Exception:
         pass
 
-    current = _detect_current_code(data)
+
+def wait_and_patch_proinfo(platform: str, since: float | None = None, timeout: float | None = None) -> bool:
+    job = current_job()
+    started = time.monotonic()
+    readback_dir = job.readback_dir
+    readback_dir.mkdir(parents=True, exist_ok=True)
+    log("flow.wait_proinfo")
+
+    if timeout is None:
+        timeout = READBACK_TIMEOUT_SEC
+    proinfo_path = wait_for_complete_file(readback_dir, "proinfo*", since=since, timeout=timeout)
+    if proinfo_path is None:
+        log("readback.timeout", sec=f"{time.monotonic() - started:.0f}")
+        return False
+    log("readback.complete", name=proinfo_path.name, waited=f"{time.monotonic() - started:.1f}")
+
+    log("country.detecting")
+
+    _close_spft(job)
+
+    try:
+        with proinfo_path.open("rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            current = _detect_current_code(mm)
+    except (OSError, ValueError):
+        log("country.no_file")
+        return False
     if current:
         log("country.detected", code=current)
     else:
         log("country.not_detected")
 
-    while True:
-        try:
-            answer = input(get_string("country.change_prompt")).strip().lower()
-        except EOFError:
-            answer = ""
-
-        if answer == "y":
-            log_text(get_string("country.notice"))
-            new_code = _select_country()
-            if not new_code:
-                log("country.no_change")
-                patched = data
-            else:
-                log("country.patching", code=new_code)
-                patched = _patch_country(data, new_code)
-            break
-        elif answer == "n" or answer == "":
-            log("country.no_change")
-            patched = data
-            break
+    new_code = ""
+    if job.unattended:
+        new_code = (job.country or "").upper()
+        if new_code:
+            log("country.patching", code=new_code)
         else:
-            log("country.invalid")
+            log("country.no_change")
+    else:
+        with job.console():
+            while True:
+                try:
+                    answer = job.prompt(get_string("country.change_prompt")).strip().lower()
+                except EOFError:
+                    answer = ""
+
+                if answer == "y":
+                    log_text(get_string("country.notice"))
+                    new_code = _select_country()
+                    if not new_code:
+                        log("country.no_change")
+                    else:
+                        log("country.patching", code=new_code)
+                    break
+                elif answer == "n" or answer == "":
+                    log("country.no_change")
+                    break
+                else:
+                    log("country.invalid")
 
-    dst = IMAGE_DIR / "proinfo"
-    dst.write_bytes(patched)
+    if not _stage_proinfo(proinfo_path, job.image_dir / "proinfo", new_code, strict=job.unattended):
+        log("country.patch_failed", code=new_code)
+        return False
     log("flow.proinfo_copied")
+    return True
@@ -0,0 +1,69 @@
+import os
+import subprocess
+import time
+from pathlib import Path
+from typing import Callable
+
+from .constants import READINESS_LIMITS, READINESS_POLL_SEC
+from .utils import log
+from . import trace
+
+
+def files_present(*paths: Path) -> Callable[[], bool]:
+    def check() -> bool:
+        return all(p.is_file() for p in paths)
+
+    return check
+
+
+def process_window_ready(proc: subprocess.Popen | None) -> Callable[[], bool]:
+    def check() -> bool:
+        if proc is None:
+            return True
+        if proc.poll() is not None:
+            return True
+        if os.name != "nt":
+            return True
+        try:
+            import ctypes
+
+            handle = int(proc._handle)  # type: ignore[attr-defined]
+            return ctypes.windll.user32.WaitForInputIdle(handle, 0) == 0  # type: ignore[attr-defined]
+        except Exception:
+            return True
+
+    return check
+
+
+def wait_ready(name: str, condition: Callable[[], bool], legacy_sec: float) -> bool:
+    min_sec, max_sec = READINESS_LIMITS.get(name, (0.0, legacy_sec))
+    with trace.span(f"wait_ready {name}", "wait") as sp:
+        ok = _wait_loop(condition, min_sec, max_sec, sp)
+    waited = sp.args["sec"]
+    saved = max(0.0, legacy_sec - waited)
+    if ok:
+        log("ready.done", name=name, waited=f"{waited:.1f}", saved=f"{saved:.1f}")
+    else:
+        log("ready.timeout", name=name, waited=f"{waited:.1f}")
+    return ok
+
+
+def _wait_loop(condition: Callable[[], bool], min_sec: float, max_sec: float, sp: trace.Span) -> bool:
+    start = time.monotonic()
+    iterations = 0
+    while True:
+        iterations += 1
+        try:
+            ok = condition()
+        except Exception:
+            ok = False
+        elapsed = time.monotonic() - start
+        if ok and elapsed >= min_sec:
+            break
+        if elapsed >= max_sec:
+            break
+        time.sleep(READINESS_POLL_SEC)
+    sp.args["iterations"] = iterations
+    sp.args["sec"] = time.monotonic() - start
+    sp.args["ok"] = ok
+    return ok
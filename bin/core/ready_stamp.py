@@ -0,0 +1,93 @@
+import json
+import os
+import sys
+from pathlib import Path
+
+from .constants import (
+    READY_STAMP_FILE,
+    PYTHON_DIR,
+    PLATFORM_TOOLS_DIR,
+    SPFT_EXE,
+    PRC_DIR,
+    PRC_MEMBERS,
+    MANIFESTS_DIR,
+    PYTHON_VERSION,
+    SPFT_ZIP_PREFIX,
+    REQUIRED_PYTHON_PACKAGES,
+)
+
+_STAMP_VERSION = 1
+
+
+def _versions() -> list:
+    return [_STAMP_VERSION, PYTHON_VERSION, SPFT_ZIP_PREFIX, list(REQUIRED_PYTHON_PACKAGES), sys.version]
+
+
+def _required_paths() -> list[Path]:
+    paths = [
+        PYTHON_DIR / "python.exe",
+        PLATFORM_TOOLS_DIR / "adb.exe",
+        PLATFORM_TOOLS_DIR / "source.properties",
+        SPFT_EXE,
+    ]
+    paths.extend(PRC_DIR / name for name in PRC_MEMBERS)
+    paths.extend(MANIFESTS_DIR / f"{name}.json" for name in ("platform-tools", "spflashtool", "prc"))
+    return paths
+
+
+def _tracked_paths() -> list[Path]:
+    paths = _required_paths()
+    for name in REQUIRED_PYTHON_PACKAGES:
+        module = sys.modules.get(name)
+        origin = getattr(module, "__file__", None)
+        if origin:
+            paths.append(Path(origin))
+    return paths
+
+
+def _stat(path: str) -> list[int] | None:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return [st.st_size, st.st_mtime_ns]
+
+
+def is_ready() -> bool:
+    try:
+        data = json.loads(READY_STAMP_FILE.read_text(encoding="utf-8"))
+        if data["versions"] != _versions():
+            return False
+        files = data["files"]
+    except (OSError, ValueError, KeyError, TypeError):
+        return False
+    if not isinstance(files, dict) or any(str(path) not in files for path in _required_paths()):
+        return False
+    for path, expected in files.items():
+        if _stat(path) != expected:
+            return False
+    return True
+
+
+def write_stamp() -> bool:
+    files: dict[str, list[int]] = {}
+    for path in _tracked_paths():
+        info = _stat(str(path))
+        if info is None:
+            return False
+        files[str(path)] = info
+    try:
+        READY_STAMP_FILE.parent.mkdir(parents=True, exist_ok=True)
+        tmp = READY_STAMP_FILE.with_name(f"{READY_STAMP_FILE.name}.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps({"versions": _versions(), "files": files}, indent=2), encoding="utf-8")
+        os.replace(tmp, READY_STAMP_FILE)
+        return True
+    except OSError:
+        return False
+
+
+def clear_stamp() -> None:
+    try:
+        READY_STAMP_FILE.unlink()
+    except OSError:
+        pass
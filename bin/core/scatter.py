@@ -1,90 +1,133 @@
+import io
+import os
+from dataclasses import dataclass
 from pathlib import Path
-import xml.etree.ElementTree as ET
+from typing import TYPE_CHECKING
 
-from .constants import IMAGE_DIR
 from .utils import log
-from .xml_crypto import decrypt_scatter_x
+from .xml_crypto import decrypt_scatter_x_to
+from .job import current_job
+from . import scatter_cache
+
+if TYPE_CHECKING:
+    import xml.etree.ElementTree as ET
+
+
+@dataclass(frozen=True)
+class PartitionPatch:
+    partition: str
+    fields: tuple[tuple[str, str], ...]
+    missing_key: str
+    applied_key: str | None = None
+
+
+PROINFO_PATCH = PartitionPatch(
+    "proinfo",
+    (("file_name", "proinfo"), ("is_download", "true"), ("is_upgradable", "true")),
+    missing_key="scatter.proinfo_not_found",
+)
+
+USERDATA_KEEP_PATCH = PartitionPatch(
+    "userdata",
+    (("file_name", "userdata.img"), ("is_download", "false"), ("is_upgradable", "false")),
+    missing_key="scatter.userdata_not_found",
+    applied_key="scatter.userdata_patched",
+)
+
+VARIANT_PATCHES: dict[str, tuple[PartitionPatch, ...]] = {
+    "global": (PROINFO_PATCH,),
+    "keep_data": (PROINFO_PATCH, USERDATA_KEEP_PATCH),
+}
 
 
 def _find_scatter_x(platform: str) -> Path | None:
-    if not IMAGE_DIR.is_dir():
+    image_dir = current_job().image_dir
+    if not image_dir.is_dir():
         log("scatter.not_found")
         return None
     platform = platform.strip()
     if platform:
-        candidate = IMAGE_DIR / f"{platform}_Android_scatter.x"
+        candidate = image_dir / f"{platform}_Android_scatter.x"
         if candidate.is_file():
             return candidate
-    for p in IMAGE_DIR.glob("*_Android_scatter.x"):
+    for p in image_dir.glob("*_Android_scatter.x"):
         if p.is_file():
             return p
     log("scatter.not_found")
     return None
 
 
-def _convert_x_to_xml(scatter_x: Path) -> Path:
-    out_path = IMAGE_DIR / "Android_scatter.xml"
+def _decrypt_to_tree(scatter_x: Path) -> "ET.ElementTree":
+    import xml.etree.ElementTree as ET
+
     log("scatter.convert")
-    body = decrypt_scatter_x(scatter_x)
-    out_path.write_bytes(body)
+    buf = io.BytesIO()
+    decrypt_scatter_x_to(scatter_x, buf)
+    buf.seek(0)
+    tree = ET.parse(buf)
     log("scatter.convert_done")
-    return out_path
+    return tree
 
 
-def _create_ab_scatter(xml_path: Path) -> Path:
-    ab_path = IMAGE_DIR / "Android_scatter_A,B.xml"
-    log("scatter.create_ab")
-    ab_path.write_bytes(xml_path.read_bytes())
-    return ab_path
+def _apply_patch(root: "ET.Element", patch: PartitionPatch) -> bool:
+    import xml.etree.ElementTree as ET
 
-
-def _patch_proinfo(ab_path: Path, final_name: str) -> Path:
-    tree = ET.parse(str(ab_path))
-    root = tree.getroot()
     found = False
     for part in root.findall(".//partition_index"):
         name = part.findtext("partition_name", "").strip().lower()
-        if name == "proinfo":
-            found = True
-            fn = part.find("file_name")
-            if fn is None:
-                fn = ET.SubElement(part, "file_name")
-            fn.text = "proinfo"
-            is_download = part.find("is_download")
-            if is_download is None:
-                is_download = ET.SubElement(part, "is_download")
-            is_download.text = "true"
-            is_upgradable = part.find("is_upgradable")
-            if is_upgradable is None:
-                is_upgradable = ET.SubElement(part, "is_upgradable")
-            is_upgradable.text = "true"
-    final_path = IMAGE_DIR / final_name
-    tree.write(str(final_path), encoding="utf-8", xml_declaration=True)
+        if name != patch.partition:
+            continue
+        found = True
+        for tag, value in patch.fields:
+            el = part.find(tag)
+            if el is None:
+                el = ET.SubElement(part, tag)
+            el.text = value
     if not found:
-        log("scatter.proinfo_not_found")
-    return final_path
+        log(patch.missing_key)
+    elif patch.applied_key:
+        log(patch.applied_key)
+    return found
 
 
-def _cleanup_temp() -> None:
-    for name in ("Android_scatter.xml", "Android_scatter_A,B.xml"):
-        p = IMAGE_DIR / name
-        if p.is_file():
-            try:
-                p.unlink()
-            except Exception:
-                pass
-    log("scatter.temp_cleanup")
+def _write_atomic(tree: "ET.ElementTree", final_path: Path) -> None:
+    tmp = final_path.with_name(final_path.name + ".part")
+    try:
+        tree.write(str(tmp), encoding="utf-8", xml_declaration=True)
+        os.replace(tmp, final_path)
+    except BaseException:
+        try:
+            tmp.unlink()
+        except OSError:
+            pass
+        raise
+
+
+def build_scatter(scatter_x: Path, final_path: Path, patches: tuple[PartitionPatch, ...]) -> Path:
+    tree = _decrypt_to_tree(scatter_x)
+    root = tree.getroot()
+    for patch in patches:
+        _apply_patch(root, patch)
+    _write_atomic(tree, final_path)
+    return final_path
 
 
-def prepare_platform_scatter(platform: str) -> Path | None:
+def prepare_platform_scatter(platform: str, variant: str = "global") -> Path | None:
     scatter_x = _find_scatter_x(platform)
     if scatter_x is None:
         return None
     log("scatter.found_x", name=scatter_x.name)
-    xml_path = _convert_x_to_xml(scatter_x)
-    ab_path = _create_ab_scatter(xml_path)
-    final_name = scatter_x.name.replace(".x", ".xml")
-    final_path = _patch_proinfo(ab_path, final_name)
-    _cleanup_temp()
+    final_path = current_job().image_dir / scatter_x.name.replace(".x", ".xml")
+    try:
+        key = scatter_cache.cache_key(scatter_x, variant)
+    except OSError:
+        key = ""
+    if key and scatter_cache.restore(key, final_path):
+        log("scatter.cache_hit")
+        log("scatter.final_saved", path=str(final_path))
+        return final_path
+    build_scatter(scatter_x, final_path, VARIANT_PATCHES.get(variant, VARIANT_PATCHES["global"]))
+    if key:
+        scatter_cache.store(key, final_path)
     log("scatter.final_saved", path=str(final_path))
     return final_path
@@ -0,0 +1,76 @@
+import hashlib
+import os
+import shutil
+import threading
+from pathlib import Path
+
+from .constants import SCATTER_CACHE_DIR, SCATTER_CACHE_MAX_BYTES
+
+SCATTER_CACHE_VERSION = 1
+
+
+def cache_key(scatter_x: Path, variant: str) -> str:
+    h = hashlib.sha256()
+    with scatter_x.open("rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(chunk)
+    return f"{h.hexdigest()}-{variant}-v{SCATTER_CACHE_VERSION}"
+
+
+def _entry(key: str) -> Path:
+    return SCATTER_CACHE_DIR / f"{key}.xml"
+
+
+def _place(src: Path, dest: Path) -> None:
+    try:
+        if dest.exists():
+            dest.unlink()
+    except OSError:
+        pass
+    try:
+        os.link(src, dest)
+    except OSError:
+        shutil.copyfile(src, dest)
+
+
+def restore(key: str, dest: Path) -> bool:
+    entry = _entry(key)
+    try:
+        os.utime(entry)
+        _place(entry, dest)
+    except OSError:
+        return False
+    return True
+
+
+def store(key: str, src: Path) -> None:
+    try:
+        SCATTER_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        tmp = SCATTER_CACHE_DIR / f"{key}.{os.getpid()}.{threading.get_ident()}.tmp"
+        shutil.copyfile(src, tmp)
+        os.replace(tmp, _entry(key))
+    except OSError:
+        return
+    evict()
+
+
+def evict(max_bytes: int = SCATTER_CACHE_MAX_BYTES) -> None:
+    entries: list[tuple[float, int, Path]] = []
+    try:
+        for p in SCATTER_CACHE_DIR.glob("*.xml"):
+            try:
+                st = p.stat()
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, p))
+    except OSError:
+        return
+    total = sum(size for _, size, _ in entries)
+    for _, size, p in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            p.unlink()
+        except OSError:
+            continue
+        total -= size
@@ -0,0 +1,174 @@
+import re
+import time
+from dataclasses import dataclass
+from typing import Callable, IO, Iterable, Iterator
+
+_PARTITION = re.compile(
+    r"(?:partition(?:\s*name)?\s*[\[:=(]?|image(?:\s*name)?\s*[\[:=(])\s*['\"]?(?P<name>[A-Za-z0-9_][\w.-]*)",
+    re.IGNORECASE,
+)
+_NOT_PARTITIONS = {"table", "data", "list", "info", "size"}
+_PERCENT = re.compile(r"(?P<pct>\d{1,3}(?:\.\d+)?)\s*%")
+_BYTES = re.compile(
+    r"(?P<done>\d+(?:\.\d+)?)\s*(?P<du>[KMG]?B)?\s*/\s*(?P<total>\d+(?:\.\d+)?)\s*(?P<tu>[KMG]?B)\b",
+    re.IGNORECASE,
+)
+_ERROR = re.compile(r"\b(?:ERROR|STATUS_\w*(?:FAIL|ERR)\w*|FAILED)\b", re.IGNORECASE)
+_STAGES: tuple[tuple[re.Pattern, str], ...] = (
+    (re.compile(r"all command exec done|download succeeded|download ok\b", re.IGNORECASE), "done"),
+    (re.compile(r"connect(?:ing)? (?:to )?brom|brom connected|searching .*port|scan(?:ning)? port", re.IGNORECASE), "connect"),
+    (re.compile(r"\bDA\b.*(?:connect|download|sent|jump)|(?:connect|download)\w* .*\bDA\b", re.IGNORECASE), "da"),
+    (re.compile(r"\bformat", re.IGNORECASE), "format"),
+    (re.compile(r"\breadback\b", re.IGNORECASE), "readback"),
+    (re.compile(r"\bdownload", re.IGNORECASE), "download"),
+)
+_UNITS = {"": 1, "B": 1, "KB": 1024, "MB": 1024**2, "GB": 1024**3}
+
+
+@dataclass(frozen=True)
+class SpftEvent:
+    kind: str
+    text: str = ""
+    stage: str = ""
+    partition: str = ""
+    percent: float | None = None
+    done_bytes: int | None = None
+    total_bytes: int | None = None
+    rate: float | None = None
+    eta: float | None = None
+    elapsed: float | None = None
+
+
+def _to_bytes(value: str, unit: str | None) -> int:
+    return int(float(value) * _UNITS.get((unit or "").upper(), 1))
+
+
+class SpftOutputParser:
+    def __init__(self, sizes: dict[str, int] | None = None, clock: Callable[[], float] = time.monotonic) -> None:
+        self.sizes = {k.lower(): v for k, v in (sizes or {}).items()}
+        self.clock = clock
+        self.stage = ""
+        self.partition = ""
+        self.failed = False
+        self._started = 0.0
+        self._last: SpftEvent | None = None
+        self._finished: set[str] = set()
+
+    def _finish_partition(self) -> list[SpftEvent]:
+        if not self.partition or self._last is None:
+            self.partition = ""
+            return []
+        last = self._last
+        elapsed = self.clock() - self._started
+        total = last.total_bytes
+        rate = total / elapsed if total and elapsed > 0 else None
+        event = SpftEvent(
+            "partition_done",
+            stage=self.stage,
+            partition=self.partition,
+            percent=100.0,
+            done_bytes=total,
+            total_bytes=total,
+            rate=rate,
+            elapsed=elapsed,
+        )
+        self._finished.add(self.partition.lower())
+        self.partition = ""
+        self._last = None
+        return [event]
+
+    def _progress(self, text: str, percent: float | None, done: int | None, total: int | None) -> SpftEvent:
+        now = self.clock()
+        if total is None:
+            total = self.sizes.get(self.partition.lower())
+        if done is None and percent is not None and total:
+            done = int(total * percent / 100)
+        if percent is None and done is not None and total:
+            percent = done * 100.0 / total
+        elapsed = now - self._started
+        rate = done / elapsed if done and elapsed > 0 else None
+        eta = (total - done) / rate if rate and total and done is not None else None
+        event = SpftEvent(
+            "progress",
+            text=text,
+            stage=self.stage,
+            partition=self.partition,
+            percent=percent,
+            done_bytes=done,
+            total_bytes=total,
+            rate=rate,
+            eta=eta,
+            elapsed=elapsed,
+        )
+        self._last = event
+        return event
+
+    def feed(self, line: str) -> list[SpftEvent]:
+        text = line.strip()
+        if not text:
+            return []
+        events: list[SpftEvent] = []
+        if _ERROR.search(text):
+            self.failed = True
+            events.append(SpftEvent("error", text=text, stage=self.stage, partition=self.partition))
+            return events
+        for pattern, stage in _STAGES:
+            if pattern.search(text):
+                if stage != self.stage and not (stage == "download" and self.partition):
+                    events.extend(self._finish_partition())
+                    self.stage = stage
+                    events.append(SpftEvent("stage", text=text, stage=stage))
+                break
+        m_part = _PARTITION.search(text)
+        m_pct = _PERCENT.search(text)
+        m_bytes = _BYTES.search(text)
+        if m_part is not None and m_part.group("name").lower() in _NOT_PARTITIONS:
+            m_part = None
+        if m_part is not None and m_part.group("name").lower() in self._finished:
+            return events or [SpftEvent("text", text=text, stage=self.stage, partition=m_part.group("name"))]
+        if m_part is not None and m_part.group("name").lower() != self.partition.lower():
+            events.extend(self._finish_partition())
+            self.partition = m_part.group("name")
+            self._started = self.clock()
+        if m_pct is None and m_bytes is None:
+            if not events:
+                events.append(SpftEvent("text", text=text, stage=self.stage, partition=self.partition))
+            return events
+        if self._last is None and not self.partition:
+            self._started = self.clock()
+        percent = min(100.0, float(m_pct.group("pct"))) if m_pct else None
+        done = total = None
+        if m_bytes is not None:
+            done = _to_bytes(m_bytes.group("done"), m_bytes.group("du") or m_bytes.group("tu"))
+            total = _to_bytes(m_bytes.group("total"), m_bytes.group("tu"))
+        events.append(self._progress(text, percent, done, total))
+        if percent is not None and percent >= 100 and self.partition:
+            events.extend(self._finish_partition())
+        return events
+
+    def finish(self) -> list[SpftEvent]:
+        return self._finish_partition()
+
+
+def iter_lines(stream: IO[bytes], encoding: str = "utf-8") -> Iterator[str]:
+    pending = b""
+    while True:
+        chunk = stream.read1(4096) if hasattr(stream, "read1") else stream.read(4096)
+        if not chunk:
+            break
+        pending += chunk
+        parts = re.split(rb"\r\n|\r|\n", pending)
+        pending = parts.pop()
+        for part in parts:
+            yield part.decode(encoding, errors="replace")
+    if pending:
+        yield pending.decode(encoding, errors="replace")
+
+
+def parse_transcript(lines: Iterable[str], sizes: dict[str, int] | None = None, clock: Callable[[], float] | None = None) -> list[SpftEvent]:
+    parser = SpftOutputParser(sizes, clock or time.monotonic)
+    events: list[SpftEvent] = []
+    for line in lines:
+        events.extend(parser.feed(line))
+    events.extend(parser.finish())
+    return events
@@ -0,0 +1,129 @@
+import os
+import re
+import shutil
+import threading
+from pathlib import Path
+from typing import Callable
+
+from .constants import IMAGE_DIR, TOOLS_DIR, WORKSPACES_DIR, FLASH_SLOTS_ENV_VAR, FLASH_SLOTS_DEFAULT
+from .job import Job, job_context
+from .utils import log, safe_rmtree, _ensure_device_tracker
+from . import trace
+
+_IMAGE_SKIP_NAMES = {"proinfo", "android_scatter.xml", "android_scatter_a,b.xml"}
+_TOOLS_SKIP_NAMES = {"platform-tools", "prc", "download files", "readback", "history.ini", "cache", "manifests", "store"}
+
+
+def _safe_name(serial: str) -> str:
+    return re.sub(r"[^A-Za-z0-9._-]", "_", serial) or "device"
+
+
+def _link_or_copy(src: Path, dst: Path) -> None:
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
+def _mirror_tree(src: Path, dst: Path, skip: Callable[[Path], bool]) -> None:
+    dst.mkdir(parents=True, exist_ok=True)
+    if not src.is_dir():
+        return
+    for entry in src.iterdir():
+        if skip(entry):
+            continue
+        target = dst / entry.name
+        if entry.is_dir():
+            _mirror_tree(entry, target, lambda p: False)
+        elif entry.is_file() and not target.exists():
+            _link_or_copy(entry, target)
+
+
+def _skip_image_entry(entry: Path) -> bool:
+    name = entry.name.lower()
+    return name in _IMAGE_SKIP_NAMES or name.endswith("_android_scatter.xml")
+
+
+def _skip_tools_entry(entry: Path) -> bool:
+    return entry.name.lower() in _TOOLS_SKIP_NAMES
+
+
+def prepare_workspace(serial: str) -> Path:
+    root = WORKSPACES_DIR / _safe_name(serial)
+    safe_rmtree(root)
+    _mirror_tree(IMAGE_DIR, root / "image", _skip_image_entry)
+    _mirror_tree(TOOLS_DIR, root / "tools", _skip_tools_entry)
+    return root
+
+
+def connected_serials() -> list[str]:
+    tracker = _ensure_device_tracker()
+    if tracker is None:
+        return []
+    tracker.sync()
+    return sorted(sn for sn, state in tracker.states().items() if state == "device")
+
+
+def flash_slots() -> int:
+    # A device in preloader mode exposes only a VID:PID, not its ADB serial, and every
+    # SP Flash Tool instance connects to the first preloader port it finds. With several
+    # devices rebooting at once an instance can flash another device's workspace (and its
+    # proinfo), so reboot-to-flash windows are limited to this many at a time. Raise it
+    # only when each SPFT instance is pinned to its own port.
+    raw = os.environ.get(FLASH_SLOTS_ENV_VAR, "").strip()
+    try:
+        slots = int(raw) if raw else FLASH_SLOTS_DEFAULT
+    except ValueError:
+        slots = FLASH_SLOTS_DEFAULT
+    return max(1, slots)
+
+
+def _run_job(job: Job, flow: Callable[[], object], results: dict[str, bool]) -> None:
+    with job_context(job):
+        try:
+            outcome = flow()
+            ok = getattr(outcome, "ok", True)
+            results[job.serial or ""] = ok
+            if ok:
+                log("station.job_done", serial=job.serial)
+            else:
+                log("station.job_failed", serial=job.serial, error=getattr(outcome, "failed_step", None))
+        except Exception as e:
+            results[job.serial or ""] = False
+            log("station.job_failed", serial=job.serial, error=str(e))
+        finally:
+            if job.workspace is not None:
+                safe_rmtree(job.workspace)
+
+
+def run_station(flow: Callable[[], object], serials: list[str] | None = None) -> dict[str, bool]:
+    if serials is None:
+        serials = connected_serials()
+    if not serials:
+        log("station.no_devices")
+        return {}
+    with trace.trace_session("station"):
+        return _run_station(flow, serials)
+
+
+def _run_station(flow: Callable[[], object], serials: list[str]) -> dict[str, bool]:
+    log("station.start", count=len(serials))
+    flash_lock = threading.Semaphore(flash_slots())
+    console_lock = threading.RLock()
+    results: dict[str, bool] = {}
+    threads: list[threading.Thread] = []
+    for serial in serials:
+        log("station.workspace", serial=serial)
+        job = Job(
+            serial=serial,
+            workspace=prepare_workspace(serial),
+            flash_lock=flash_lock,
+            console_lock=console_lock,
+        )
+        t = threading.Thread(target=_run_job, args=(job, flow, results), name=f"station-{serial}", daemon=True)
+        threads.append(t)
+        t.start()
+    for t in threads:
+        t.join()
+    log("station.done", ok=sum(1 for v in results.values() if v), total=len(serials))
+    return results
@@ -0,0 +1,145 @@
+import contextlib
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Iterator
+
+from .constants import TRACE_DIR, TRACE_ENV_VAR
+
+_lock = threading.Lock()
+_events: list[dict] = []
+_depth = 0
+_origin_ns = 0
+_session_name = ""
+_pids: dict[str, int] = {}
+_tids: dict[tuple[int, int], int] = {}
+
+
+def _enabled() -> bool:
+    return os.environ.get(TRACE_ENV_VAR, "1").strip() not in ("0", "off", "false")
+
+
+def active() -> bool:
+    return _depth > 0
+
+
+def _track() -> tuple[int, int]:
+    from .job import current_job
+
+    serial = current_job().serial or "main"
+    ident = threading.get_ident()
+    with _lock:
+        pid = _pids.get(serial)
+        if pid is None:
+            pid = len(_pids) + 1
+            _pids[serial] = pid
+            _events.append({"name": "process_name", "ph": "M", "pid": pid, "tid": 0, "args": {"name": serial}})
+        tid = _tids.get((pid, ident))
+        if tid is None:
+            tid = len(_tids) + 1
+            _tids[(pid, ident)] = tid
+            _events.append(
+                {"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": threading.current_thread().name}}
+            )
+    return pid, tid
+
+
+def _us(ns: int) -> float:
+    return (ns - _origin_ns) / 1000.0
+
+
+class Span:
+    def __init__(self, name: str, cat: str, args: dict) -> None:
+        self.name = name
+        self.cat = cat
+        self.args = args
+
+    def __enter__(self) -> "Span":
+        self._start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if not active():
+            return
+        end = time.perf_counter_ns()
+        pid, tid = _track()
+        if exc_type is not None:
+            self.args["error"] = exc_type.__name__
+        event = {
+            "name": self.name,
+            "cat": self.cat,
+            "ph": "X",
+            "ts": _us(self._start),
+            "dur": (end - self._start) / 1000.0,
+            "pid": pid,
+            "tid": tid,
+        }
+        if self.args:
+            event["args"] = {k: v if isinstance(v, (int, float, bool, type(None))) else str(v) for k, v in self.args.items()}
+        with _lock:
+            _events.append(event)
+
+
+def span(name: str, cat: str = "step", **args) -> Span:
+    return Span(name, cat, args)
+
+
+def instant(name: str, cat: str = "event", **args) -> None:
+    if not active():
+        return
+    pid, tid = _track()
+    event = {"name": name, "cat": cat, "ph": "i", "s": "t", "ts": _us(time.perf_counter_ns()), "pid": pid, "tid": tid}
+    if args:
+        event["args"] = {k: str(v) for k, v in args.items()}
+    with _lock:
+        _events.append(event)
+
+
+def sleep(seconds: float, name: str = "sleep") -> None:
+    with span(name, "sleep", sec=seconds):
+        time.sleep(seconds)
+
+
+def _write(name: str) -> Path | None:
+    with _lock:
+        events = list(_events)
+        _events.clear()
+        _pids.clear()
+        _tids.clear()
+    try:
+        TRACE_DIR.mkdir(parents=True, exist_ok=True)
+        ts = datetime.now().strftime("%Y.%m.%d.%H.%M.%S")
+        path = TRACE_DIR / f"{name}_{ts}.json"
+        path.write_text(json.dumps({"traceEvents": events, "displayTimeUnit": "ms"}), encoding="utf-8")
+        return path
+    except OSError:
+        return None
+
+
+@contextlib.contextmanager
+def trace_session(name: str) -> Iterator[None]:
+    global _depth, _origin_ns, _session_name
+    if not _enabled():
+        yield
+        return
+    with _lock:
+        _depth += 1
+        if _depth == 1:
+            _origin_ns = time.perf_counter_ns()
+            _session_name = name
+    try:
+        with span(name, "flow"):
+            yield
+    finally:
+        with _lock:
+            _depth -= 1
+            last = _depth == 0
+        if last:
+            path = _write(_session_name)
+            if path is not None:
+                from .utils import log
+
+                log("trace.saved", path=str(path))
@@ -0,0 +1,167 @@
+import abc
+import os
+import re
+import select
+import socket
+import subprocess
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable
+
+from . import trace
+from .constants import USB_SYSFS_ROOT, USB_POLL_SEC, USB_SYSFS_POLL_SEC
+
+_NETLINK_KOBJECT_UEVENT = 15
+_INSTANCE_ID = re.compile(r"VID_([0-9A-F]{4})&PID_([0-9A-F]{4})", re.IGNORECASE)
+
+
+@dataclass(frozen=True)
+class UsbDevice:
+    vid: str
+    pid: str
+    name: str = ""
+    path: str = ""
+
+
+DeviceMatch = Callable[[UsbDevice], bool]
+
+
+class UsbBackend(abc.ABC):
+    name = "poll"
+    poll_sec = USB_POLL_SEC
+
+    @abc.abstractmethod
+    def scan(self) -> list[UsbDevice]:
+        ...
+
+    def _wait_event(self, timeout: float) -> None:
+        time.sleep(timeout)
+
+    def close(self) -> None:
+        pass
+
+    def wait_for(self, match: DeviceMatch, timeout: float | None = None) -> UsbDevice | None:
+        with trace.span(f"usb_wait {self.name}", "wait") as sp:
+            return self._wait_loop(match, timeout, sp)
+
+    def _wait_loop(self, match: DeviceMatch, timeout: float | None, sp: trace.Span) -> UsbDevice | None:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        sp.args["iterations"] = 0
+        while True:
+            sp.args["iterations"] += 1
+            for dev in self.scan():
+                if match(dev):
+                    return dev
+            wait = self.poll_sec
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                wait = min(wait, remaining)
+            self._wait_event(wait)
+
+
+def _read_attr(path: Path) -> str:
+    try:
+        return path.read_text(encoding="utf-8", errors="ignore").strip()
+    except OSError:
+        return ""
+
+
+class SysfsBackend(UsbBackend):
+    name = "sysfs"
+
+    def __init__(self, root: Path = USB_SYSFS_ROOT, uevents: bool = True) -> None:
+        self.root = root
+        self._sock: socket.socket | None = self._open_uevents() if uevents else None
+        self.poll_sec = USB_SYSFS_POLL_SEC if self._sock is None else 1.0
+
+    @staticmethod
+    def _open_uevents() -> socket.socket | None:
+        try:
+            sock = socket.socket(socket.AF_NETLINK, socket.SOCK_DGRAM, _NETLINK_KOBJECT_UEVENT)  # type: ignore[attr-defined]
+            sock.bind((0, 1))
+            sock.setblocking(False)
+            return sock
+        except (OSError, AttributeError, ValueError):
+            return None
+
+    def scan(self) -> list[UsbDevice]:
+        devices: list[UsbDevice] = []
+        try:
+            entries = sorted(os.scandir(self.root), key=lambda e: e.name)
+        except OSError:
+            return devices
+        for entry in entries:
+            base = Path(entry.path)
+            vid = _read_attr(base / "idVendor").lower()
+            pid = _read_attr(base / "idProduct").lower()
+            if not vid or not pid:
+                continue
+            name = _read_attr(base / "product")
+            devices.append(UsbDevice(vid, pid, name, entry.name))
+        return devices
+
+    def _wait_event(self, timeout: float) -> None:
+        if self._sock is None:
+            time.sleep(timeout)
+            return
+        ready, _, _ = select.select([self._sock], [], [], timeout)
+        if not ready:
+            return
+        try:
+            while True:
+                self._sock.recv(64 * 1024)
+        except (BlockingIOError, InterruptedError):
+            pass
+        except OSError:
+            self.close()
+
+    def close(self) -> None:
+        if self._sock is not None:
+            try:
+                self._sock.close()
+            except OSError:
+                pass
+            self._sock = None
+
+
+_PNP_QUERY = (
+    "Get-PnpDevice -PresentOnly -Status OK | Where-Object { "
+    "$_.InstanceId -like 'USB\\VID_0E8D*' -or $_.FriendlyName -like '*PreLoader*' -or "
+    "$_.FriendlyName -like '*MediaTek USB Port*' } | "
+    "ForEach-Object { $_.InstanceId + '|' + $_.FriendlyName }"
+)
+
+
+class PowerShellBackend(UsbBackend):
+    name = "powershell"
+
+    def scan(self) -> list[UsbDevice]:
+        try:
+            result = subprocess.run(
+                ["powershell", "-NoProfile", "-Command", _PNP_QUERY],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                text=True,
+                encoding="utf-8",
+                errors="ignore",
+            )
+        except Exception:
+            return []
+        devices: list[UsbDevice] = []
+        for line in (result.stdout or "").splitlines():
+            instance_id, _, name = line.strip().partition("|")
+            if not instance_id:
+                continue
+            m = _INSTANCE_ID.search(instance_id)
+            vid, pid = (m.group(1).lower(), m.group(2).lower()) if m else ("", "")
+            devices.append(UsbDevice(vid, pid, name.strip(), instance_id))
+        return devices
+
+
+def get_usb_backend() -> UsbBackend:
+    if os.name != "nt" and USB_SYSFS_ROOT.is_dir():
+        return SysfsBackend()
+    return PowerShellBackend()
@@ -1,61 +1,81 @@
 import os
 import subprocess
+import threading
 import time
 from datetime import datetime
 from pathlib import Path
 
-from .constants import LOGS_DIR, LOG_ENV_VAR, PLATFORM_TOOLS_DIR
-from .i18n import get_string
+from .constants import LOGS_DIR, LOG_ENV_VAR, LOG_JSONL_ENV_VAR, PLATFORM_TOOLS_DIR
+from .i18n import format_string
+from .adb_client import run_adb_command
+from .device_snapshot import invalidate_device_snapshot
+from .device_tracker import DeviceTracker, get_tracker
+from .job import current_job
+from .log_writer import LogWriter, flush_logs, get_writer
+from . import trace
 
 _log_file_path: Path | None = None
+_log_jsonl_path: Path | None = None
 _unauthorized_hint_shown: bool = False
+_print_lock = threading.Lock()
 
 
 def _init_log_file() -> None:
-    global _log_file_path
+    global _log_file_path, _log_jsonl_path
     env_path = os.environ.get(LOG_ENV_VAR)
     if env_path:
         _log_file_path = Path(env_path).resolve()
         _log_file_path.parent.mkdir(parents=True, exist_ok=True)
-        return
-    LOGS_DIR.mkdir(parents=True, exist_ok=True)
-    ts = datetime.now().strftime("%Y.%m.%d.%H.%M")
-    _log_file_path = (LOGS_DIR / f"run_{ts}.log").resolve()
-
-
-def _write_log_line(line: str) -> None:
-    global _log_file_path
+    else:
+        LOGS_DIR.mkdir(parents=True, exist_ok=True)
+        ts = datetime.now().strftime("%Y.%m.%d.%H.%M")
+        _log_file_path = (LOGS_DIR / f"run_{ts}.log").resolve()
+    jsonl = os.environ.get(LOG_JSONL_ENV_VAR, "").strip()
+    if jsonl == "1":
+        _log_jsonl_path = _log_file_path.with_suffix(".jsonl")
+    elif jsonl:
+        _log_jsonl_path = Path(jsonl).resolve()
+
+
+def _writer() -> LogWriter:
     if _log_file_path is None:
         _init_log_file()
+    assert _log_file_path is not None
+    return get_writer(_log_file_path, _log_jsonl_path)
+
+
+def _emit(text: str, key: str | None = None, kwargs: dict | None = None) -> None:
     try:
-        assert _log_file_path is not None
-        with _log_file_path.open("a", encoding="utf-8") as f:
-            f.write(line + "\n")
+        writer = _writer()
     except Exception:
-        pass
+        writer = None
+    now = time.time()
+    ts = time.strftime("%H:%M:%S", time.localtime(now))
+    job = current_job()
+    if job.isolated:
+        line = f"{ts} - [{job.serial}] {text}"
+    else:
+        line = f"{ts} - {text}"
+    with _print_lock:
+        print(line)
+    record = None
+    if _log_jsonl_path is not None:
+        record = {"ts": now, "mono": time.monotonic(), "serial": job.serial, "key": key, "kwargs": kwargs or {}, "text": text}
+    if writer is not None:
+        writer.submit(line, record)
 
 
 def log(message_key: str, **kwargs) -> None:
-    msg = get_string(message_key)
-    if kwargs:
-        try:
-            msg = msg.format(**kwargs)
-        except Exception:
-            pass
-    ts = datetime.now().strftime("%H:%M:%S")
-    line = f"{ts} - {msg}"
-    print(line)
-    _write_log_line(line)
+    _emit(format_string(message_key, **kwargs), message_key, kwargs)
 
 
 def log_text(text: str) -> None:
-    ts = datetime.now().strftime("%H:%M:%S")
-    line = f"{ts} - {text}"
-    print(line)
-    _write_log_line(line)
+    _emit(text)
 
 
 def clear_console() -> None:
+    if current_job().isolated:
+        return
     try:
         os.system("cls")
     except Exception:
@@ -70,24 +90,60 @@ def find_adb_path() -> str:
 
 
 def run_adb(args: list[str], capture_output: bool = True) -> subprocess.CompletedProcess:
-    adb = find_adb_path()
-    cmd = [adb] + args
-    return subprocess.run(cmd, capture_output=capture_output, text=True, encoding="utf-8", errors="replace")
+    with trace.span("adb " + " ".join(args[:3]), "subprocess") as sp:
+        serial = current_job().serial
+        if serial and args and args[0] not in ("-s", "start-server", "kill-server", "devices"):
+            args = ["-s", serial] + list(args)
+        if capture_output:
+            cp = run_adb_command(args)
+            if cp is not None:
+                sp.args["via"] = "socket"
+                return cp
+        adb = find_adb_path()
+        cmd = [adb] + args
+        sp.args["via"] = "spawn"
+        return subprocess.run(cmd, capture_output=capture_output, text=True, encoding="utf-8", errors="replace")
 
 
 def kill_adb_server() -> None:
+    job = current_job()
+    if job.isolated:
+        invalidate_device_snapshot(job.serial)
+        return
+    invalidate_device_snapshot()
     try:
         run_adb(["kill-server"], capture_output=True)
     except Exception:
         pass
 
 
-def wait_for_device(timeout_sec: int | None = None) -> bool:
+def _on_device_state(serial: str, state: str) -> None:
     global _unauthorized_hint_shown
-    log("adb.wait_usb_debugging")
-    start = time.time()
+    if state == "unauthorized" and not _unauthorized_hint_shown:
+        _unauthorized_hint_shown = True
+        log("adb.unauthorized_hint")
+
+
+def _ensure_device_tracker() -> DeviceTracker | None:
+    tracker = get_tracker()
+    if tracker is not None:
+        return tracker
+    try:
+        run_adb(["start-server"], capture_output=True)
+    except Exception:
+        return None
+    return get_tracker()
+
+
+def _poll_for_device(deadline: float | None, serial: str | None) -> bool:
+    with trace.span("poll_for_device", "wait") as sp:
+        return _poll_for_device_loop(deadline, serial, sp)
+
+
+def _poll_for_device_loop(deadline: float | None, serial: str | None, sp: trace.Span) -> bool:
     while True:
-        if timeout_sec is not None and time.time() - start > timeout_sec:
+        sp.args["iterations"] = sp.args.get("iterations", 0) + 1
+        if deadline is not None and time.monotonic() > deadline:
             log("adb.timeout")
             return False
         try:
@@ -101,19 +157,40 @@ def wait_for_device(timeout_sec: int | None = None) -> bool:
                 if "\t" in line:
                     sn, state = line.split("\t", 1)
                     devices.append((sn.strip(), state.strip()))
-            if not devices:
-                time.sleep(2)
-                continue
             for sn, state in devices:
+                if serial is not None and sn != serial:
+                    continue
                 if state == "device":
                     log("adb.device_ok", serial=sn)
                     return True
-                if state == "unauthorized" and not _unauthorized_hint_shown:
-                    _unauthorized_hint_shown = True
-                    log("adb.unauthorized_hint")
+                _on_device_state(sn, state)
         except Exception:
             pass
-        time.sleep(2)
+        trace.sleep(2)
+
+
+def wait_for_device(timeout_sec: int | None = None, serial: str | None = None) -> bool:
+    with trace.span("wait_for_device", "wait") as sp:
+        return _wait_for_device(timeout_sec, serial, sp)
+
+
+def _wait_for_device(timeout_sec: int | None, serial: str | None, sp: trace.Span) -> bool:
+    log("adb.wait_usb_debugging")
+    serial = serial or current_job().serial
+    deadline = None if timeout_sec is None else time.monotonic() + timeout_sec
+    while True:
+        sp.args["iterations"] = sp.args.get("iterations", 0) + 1
+        tracker = _ensure_device_tracker()
+        if tracker is None:
+            return _poll_for_device(deadline, serial)
+        remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+        sn = tracker.wait_for(serial, timeout=remaining, on_change=_on_device_state)
+        if sn is not None:
+            log("adb.device_ok", serial=sn)
+            return True
+        if deadline is not None and time.monotonic() >= deadline:
+            log("adb.timeout")
+            return False
 
 
 def adb_shell_getprop(prop: str) -> str:
@@ -123,21 +200,24 @@ def adb_shell_getprop(prop: str) -> str:
 
 
 def adb_reboot() -> None:
+    invalidate_device_snapshot(current_job().serial)
     run_adb(["reboot"], capture_output=True)
 
 
 def run_cmd(cmd: list[str], cwd: str | None = None, timeout: int | None = None) -> subprocess.CompletedProcess:
-    return subprocess.run(cmd, cwd=cwd, timeout=timeout, capture_output=True, text=True, encoding="utf-8", errors="replace")
+    with trace.span(Path(cmd[0]).name if cmd else "cmd", "subprocess"):
+        return subprocess.run(cmd, cwd=cwd, timeout=timeout, capture_output=True, text=True, encoding="utf-8", errors="replace")
 
 
 def run_powershell(ps_script: str) -> subprocess.CompletedProcess:
-    return subprocess.run(
-        ["powershell", "-NoProfile", "-ExecutionPolicy", "Bypass", "-Command", ps_script],
-        capture_output=True,
-        text=True,
-        encoding="utf-8",
-        errors="replace",
-    )
+    with trace.span("powershell", "subprocess"):
+        return subprocess.run(
+            ["powershell", "-NoProfile", "-ExecutionPolicy", "Bypass", "-Command", ps_script],
+            capture_output=True,
+            text=True,
+            encoding="utf-8",
+            errors="replace",
+        )
 
 
 def ensure_dir(p: Path) -> None:
@@ -1,6 +1,13 @@
 import hashlib
+import io
 import struct
 from pathlib import Path
+from typing import BinaryIO
+
+_CHUNK_SIZE = 64 * 1024
+_HEADER_SIZE = 16
+_DIGEST_SIZE = 32
+_SIGNATURE = b"\xcf\x06\x05\x04\x03\x02\x01\xfc"
 
 
 def _pbkdf1(password: str, salt: bytes, out_len: int, iterations: int = 1000) -> bytes:
@@ -11,29 +18,76 @@ def _pbkdf1(password: str, salt: bytes, out_len: int, iterations: int = 1000) ->
     return digest[:out_len]
 
 
-def decrypt_scatter_x(path: Path | str) -> bytes:
+class _PayloadSink:
+    def __init__(self, out: BinaryIO) -> None:
+        self.out = out
+        self.header = bytearray()
+        self.remaining = -1
+        self.digest = bytearray()
+        self.hasher = hashlib.sha256()
+
+    def feed(self, mv: memoryview) -> None:
+        pos = 0
+        n = len(mv)
+        if len(self.header) < _HEADER_SIZE:
+            take = min(_HEADER_SIZE - len(self.header), n)
+            self.header += mv[:take]
+            pos += take
+            if len(self.header) == _HEADER_SIZE:
+                size = struct.unpack("<q", self.header[:8])[0]
+                if bytes(self.header[8:16]) != _SIGNATURE:
+                    raise ValueError("invalid signature")
+                if size < 0:
+                    raise ValueError("invalid decrypted data")
+                self.remaining = size
+        if self.remaining > 0 and pos < n:
+            take = min(self.remaining, n - pos)
+            part = mv[pos : pos + take]
+            self.hasher.update(part)
+            self.out.write(part)
+            self.remaining -= take
+            pos += take
+        if self.remaining == 0 and len(self.digest) < _DIGEST_SIZE and pos < n:
+            take = min(_DIGEST_SIZE - len(self.digest), n - pos)
+            self.digest += mv[pos : pos + take]
+
+    def verify(self) -> None:
+        if len(self.header) < _HEADER_SIZE:
+            raise ValueError("invalid decrypted data")
+        if self.remaining != 0 or self.hasher.digest() != bytes(self.digest):
+            raise ValueError("hash mismatch")
+
+
+def decrypt_scatter_x_to(path: Path | str, out: BinaryIO, chunk_size: int = _CHUNK_SIZE) -> None:
     from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
 
     p = Path(path)
-    data = p.read_bytes()
-    if len(data) < 64:
+    if p.stat().st_size < 64:
         raise ValueError("invalid scatter.x")
-    iv = data[:16]
-    salt = data[16:32]
-    body = data[32:]
-    key = _pbkdf1("OSD", salt, 32, 1000)
-    cipher = Cipher(algorithms.AES(key), modes.CBC(iv))
-    decryptor = cipher.decryptor()
-    plain = decryptor.update(body) + decryptor.finalize()
-    if len(plain) < 16 + 32:
-        raise ValueError("invalid decrypted data")
-    size = struct.unpack("<q", plain[:8])[0]
-    signature = plain[8:16]
-    expected = b"\xcf\x06\x05\x04\x03\x02\x01\xfc"
-    if signature != expected:
-        raise ValueError("invalid signature")
-    payload = plain[16 : 16 + size]
-    digest = plain[16 + size : 16 + size + 32]
-    if hashlib.sha256(payload).digest() != digest:
-        raise ValueError("hash mismatch")
-    return payload
+    with p.open("rb") as f:
+        head = f.read(32)
+        iv = head[:16]
+        salt = head[16:32]
+        key = _pbkdf1("OSD", salt, 32, 1000)
+        decryptor = Cipher(algorithms.AES(key), modes.CBC(iv)).decryptor()
+        sink = _PayloadSink(out)
+        in_buf = bytearray(chunk_size)
+        in_view = memoryview(in_buf)
+        out_buf = bytearray(chunk_size + 16)
+        out_view = memoryview(out_buf)
+        while True:
+            n = f.readinto(in_buf)
+            if not n:
+                break
+            produced = decryptor.update_into(in_view[:n], out_buf)
+            sink.feed(out_view[:produced])
+        tail = decryptor.finalize()
+        if tail:
+            sink.feed(memoryview(tail))
+    sink.verify()
+
+
+def decrypt_scatter_x(path: Path | str) -> bytes:
+    buf = io.BytesIO()
+    decrypt_scatter_x_to(path, buf)
+    return buf.getvalue()
@@ -0,0 +1,17 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "bin"))
+
+from core.constants import LOG_ENV_VAR, LOG_JSONL_ENV_VAR, TRACE_ENV_VAR  # noqa: E402
+
+
+@pytest.fixture(autouse=True, scope="session")
+def _log_file(tmp_path_factory):
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setenv(LOG_ENV_VAR, str(tmp_path_factory.mktemp("logs") / "run.log"))
+        mp.delenv(LOG_JSONL_ENV_VAR, raising=False)
+        mp.delenv(TRACE_ENV_VAR, raising=False)
+        yield
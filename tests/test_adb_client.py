@@ -0,0 +1,208 @@
+import socket
+import socketserver
+import threading
+
+import pytest
+
+from core import adb_client
+from core.adb_client import AdbClient, AdbError, AdbStreamError, _read_shell_v2, _split_exit_code, run_adb_command
+
+
+def _frame(kind: int, data: bytes) -> bytes:
+    return bytes([kind]) + len(data).to_bytes(4, "little") + data
+
+
+def _message(text: str) -> bytes:
+    data = text.encode("utf-8")
+    return f"{len(data):04x}".encode("ascii") + data
+
+
+class _Handler(socketserver.BaseRequestHandler):
+    def _recv_exact(self, size: int) -> bytes:
+        buf = b""
+        while len(buf) < size:
+            chunk = self.request.recv(size - len(buf))
+            if not chunk:
+                raise EOFError
+            buf += chunk
+        return buf
+
+    def handle(self) -> None:
+        try:
+            while True:
+                request = self._recv_exact(int(self._recv_exact(4), 16)).decode("utf-8")
+                self.server.seen.append(request)
+                if not request.startswith("host:transport"):
+                    break
+                self.request.sendall(b"OKAY")
+        except EOFError:
+            return
+        self._reply(request)
+
+    def _reply(self, request: str) -> None:
+        mode = self.server.mode
+        if request == "host:devices":
+            self.request.sendall(b"OKAY" + _message("SER1\tdevice\nSER2\tunauthorized\n"))
+        elif request == "host:kill":
+            self.request.sendall(b"OKAY")
+        elif request.startswith("shell,v2,"):
+            if mode == "legacy":
+                self.request.sendall(b"FAIL" + _message("protocol fault (no status)"))
+            elif mode == "drop":
+                return
+            elif mode == "hang":
+                self.request.sendall(b"OKAY")
+                self.server.release.wait(5)
+            else:
+                self.request.sendall(b"OKAY" + _frame(1, b"hi\n") + _frame(2, b"oops\n") + _frame(3, b"\x03"))
+        elif request.startswith("shell:"):
+            self.request.sendall(b"OKAY" + b"out line\r\n__ADB_RC__:7\r\n")
+        else:
+            self.request.sendall(b"FAIL" + _message(f"unknown request {request}"))
+
+
+class _StubServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, mode: str) -> None:
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.mode = mode
+        self.seen: list[str] = []
+        self.release = threading.Event()
+
+    def shell_requests(self) -> list[str]:
+        return [r for r in self.seen if r.startswith("shell")]
+
+
+@pytest.fixture
+def adb_stub(monkeypatch):
+    servers: list[_StubServer] = []
+    clients: list[AdbClient] = []
+
+    def start(mode: str = "v2") -> tuple[_StubServer, AdbClient]:
+        server = _StubServer(mode)
+        threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True).start()
+        client = AdbClient(port=server.server_address[1], timeout=2.0, shell_timeout=0.2)
+        monkeypatch.setattr(adb_client, "_client", client)
+        servers.append(server)
+        clients.append(client)
+        return server, client
+
+    yield start
+    for client in clients:
+        client.close()
+    for server in servers:
+        server.release.set()
+        server.shutdown()
+        server.server_close()
+
+
+def _closed_port() -> int:
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    return port
+
+
+def test_read_shell_v2_frames():
+    a, b = socket.socketpair()
+    with a, b:
+        b.sendall(_frame(1, b"out") + _frame(0, b"") + _frame(2, b"err") + _frame(1, b"put") + _frame(3, b"\x02"))
+        assert _read_shell_v2(a) == (2, b"output", b"err")
+
+
+def test_read_shell_v2_truncated_stream():
+    a, b = socket.socketpair()
+    with a:
+        b.sendall(_frame(1, b"partial") + b"\x01\x10")
+        b.close()
+        with pytest.raises(AdbStreamError):
+            _read_shell_v2(a)
+
+
+def test_split_exit_code():
+    assert _split_exit_code(b"a\r\n__ADB_RC__:1\r\nb\r\n__ADB_RC__:7\r\n") == (7, b"a\r\n__ADB_RC__:1\r\nb\r\n", b"")
+
+
+@pytest.mark.parametrize("data", [b"no marker here\n", b"out\n__ADB_RC__:\n", b"out\n__ADB_RC__:x1\n"])
+def test_split_exit_code_without_status(data):
+    with pytest.raises(AdbStreamError):
+        _split_exit_code(data)
+
+
+def test_shell_v2(adb_stub):
+    server, client = adb_stub("v2")
+    assert client.shell(["getprop", "ro.product.model"], serial="SER1") == (3, b"hi\n", b"oops\n")
+    assert server.seen[:2] == ["host:transport:SER1", "shell,v2,raw:getprop ro.product.model"]
+
+
+def test_shell_quotes_arguments(adb_stub):
+    server, client = adb_stub("v2")
+    client.shell(["echo", "it's here"])
+    assert server.seen[0] == "host:transport-any"
+    assert server.seen[1] == "shell,v2,raw:echo 'it'\\''s here'"
+
+
+def test_shell_falls_back_to_legacy_exit_marker(adb_stub):
+    server, client = adb_stub("legacy")
+    assert client.shell(["true"]) == (7, b"out line\r\n", b"")
+    assert server.shell_requests() == ["shell,v2,raw:true", "shell:true; echo __ADB_RC__:$?"]
+
+
+@pytest.mark.parametrize("mode", ["drop", "hang"])
+def test_shell_stream_error_is_not_retried(adb_stub, mode):
+    server, client = adb_stub(mode)
+    with pytest.raises(AdbStreamError):
+        client.shell(["reboot-sensitive"])
+    assert server.shell_requests() == ["shell,v2,raw:reboot-sensitive"]
+
+
+def test_run_adb_command_shell(adb_stub):
+    adb_stub("v2")
+    result = run_adb_command(["-s", "SER1", "shell", "getprop"])
+    assert result.returncode == 3
+    assert result.stdout == "hi\n"
+    assert result.stderr == "oops\n"
+
+
+def test_run_adb_command_stream_error_does_not_spawn_adb(adb_stub):
+    server, _ = adb_stub("hang")
+    result = run_adb_command(["shell", "setprop", "x", "1"])
+    assert result is not None
+    assert result.returncode == 1
+    assert "shell interrupted" in result.stderr
+    assert server.shell_requests() == ["shell,v2,raw:setprop x 1"]
+
+
+def test_run_adb_command_devices(adb_stub):
+    adb_stub()
+    result = run_adb_command(["devices"])
+    assert result.returncode == 0
+    assert result.stdout == "List of devices attached\nSER1\tdevice\nSER2\tunauthorized\n\n"
+
+
+def test_run_adb_command_kill_server(adb_stub):
+    server, _ = adb_stub()
+    assert run_adb_command(["kill-server"]).returncode == 0
+    assert "host:kill" in server.seen
+
+
+def test_run_adb_command_server_not_running(monkeypatch):
+    monkeypatch.setattr(adb_client, "_client", AdbClient(port=_closed_port(), timeout=1.0))
+    assert run_adb_command(["kill-server"]).returncode == 0
+    assert run_adb_command(["shell", "true"]) is None
+    assert run_adb_command(["devices"]) is None
+
+
+def test_run_adb_command_unsupported_falls_through(adb_stub):
+    server, _ = adb_stub()
+    assert run_adb_command(["install", "app.apk"]) is None
+    assert server.seen == []
+
+
+def test_host_request_failure(adb_stub):
+    _, client = adb_stub()
+    with pytest.raises(AdbError, match="unknown request"):
+        client.host_request("host:features")
@@ -0,0 +1,211 @@
+import hashlib
+import http.server
+import re
+import socketserver
+import threading
+
+import pytest
+
+from core import downloader
+from core.downloader import DownloadError, _download_file
+
+DATA = bytes(range(256)) * 1024
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    def log_message(self, *args) -> None:
+        pass
+
+    def do_HEAD(self) -> None:
+        self.server.seen.append(("HEAD", None))
+        self.send_response(200)
+        if self.server.sized:
+            self.send_header("Content-Length", str(len(self.server.data)))
+        if self.server.ranges:
+            self.send_header("Accept-Ranges", "bytes")
+        self.end_headers()
+
+    def do_GET(self) -> None:
+        data = self.server.data
+        header = self.headers.get("Range")
+        self.server.seen.append(("GET", header))
+        start, end = 0, len(data) - 1
+        if header and self.server.ranges:
+            m = re.match(r"bytes=(\d+)-(\d*)$", header)
+            start = int(m.group(1))
+            end = min(int(m.group(2)), end) if m.group(2) else end
+            if start >= len(data):
+                self.send_response(416)
+                self.send_header("Content-Range", f"bytes */{len(data)}")
+                self.end_headers()
+                return
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{end}/{len(data) if self.server.sized else '*'}")
+        else:
+            self.send_response(200)
+        body = data[start : end + 1]
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class _Server(socketserver.ThreadingMixIn, http.server.HTTPServer):
+    daemon_threads = True
+
+    def __init__(self, data: bytes, ranges: bool, sized: bool) -> None:
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.data = data
+        self.ranges = ranges
+        self.sized = sized
+        self.seen: list[tuple[str, str | None]] = []
+
+    def gets(self) -> list[str | None]:
+        return [header for method, header in self.seen if method == "GET"]
+
+
+@pytest.fixture
+def http_stub():
+    servers: list[_Server] = []
+
+    def start(data: bytes = DATA, ranges: bool = True, sized: bool = True) -> tuple[_Server, str]:
+        server = _Server(data, ranges, sized)
+        threading.Thread(target=server.serve_forever, args=(0.05,), daemon=True).start()
+        servers.append(server)
+        return server, f"http://127.0.0.1:{server.server_address[1]}/artifact.bin"
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def _quiet(done: int, total: int | None, rate: float) -> None:
+    pass
+
+
+def _partial(dest, data: bytes, total: int | None = len(DATA)):
+    part = dest.with_name(dest.name + ".part")
+    part.write_bytes(data)
+    part.with_name(part.name + ".src").write_text(f"{total}", encoding="utf-8")
+    return part
+
+
+def _leftovers(tmp_path) -> list[str]:
+    return sorted(p.name for p in tmp_path.iterdir() if p.name != "artifact.bin")
+
+
+def test_plain_download(http_stub, tmp_path):
+    server, url = http_stub(ranges=False)
+    dest = tmp_path / "artifact.bin"
+    _download_file(url, dest, sha256=hashlib.sha256(DATA).hexdigest(), progress=_quiet)
+    assert dest.read_bytes() == DATA
+    assert server.gets() == ["bytes=0-0", None]
+    assert _leftovers(tmp_path) == []
+
+
+def test_resume_with_range(http_stub, tmp_path):
+    server, url = http_stub()
+    dest = tmp_path / "artifact.bin"
+    _partial(dest, DATA[:100000])
+    _download_file(url, dest, progress=_quiet)
+    assert dest.read_bytes() == DATA
+    assert server.gets() == ["bytes=100000-"]
+    assert _leftovers(tmp_path) == []
+
+
+def test_resume_ignored_without_range_support(http_stub, tmp_path):
+    server, url = http_stub(ranges=False)
+    dest = tmp_path / "artifact.bin"
+    _partial(dest, DATA[:100000])
+    _download_file(url, dest, progress=_quiet)
+    assert dest.read_bytes() == DATA
+    assert server.gets()[-1] is None
+
+
+def test_segmented_download(http_stub, tmp_path, monkeypatch):
+    monkeypatch.setattr(downloader, "DOWNLOAD_SEGMENT_MIN_BYTES", 1024)
+    server, url = http_stub()
+    dest = tmp_path / "artifact.bin"
+    _download_file(url, dest, segments=4, progress=_quiet)
+    assert dest.read_bytes() == DATA
+    quarter = len(DATA) // 4
+    expected = [f"bytes={i * quarter}-{(i + 1) * quarter - 1}" for i in range(4)]
+    assert sorted(server.gets()) == sorted(expected)
+    assert _leftovers(tmp_path) == []
+
+
+def test_segmented_resume_keeps_finished_segments(http_stub, tmp_path, monkeypatch):
+    monkeypatch.setattr(downloader, "DOWNLOAD_SEGMENT_MIN_BYTES", 1024)
+    server, url = http_stub()
+    dest = tmp_path / "artifact.bin"
+    quarter = len(DATA) // 4
+    part = _partial(dest, b"")
+    part.unlink()
+    part.with_name(part.name + "0").write_bytes(DATA[:quarter])
+    part.with_name(part.name + "1").write_bytes(DATA[quarter : quarter + 10])
+    _download_file(url, dest, segments=4, progress=_quiet)
+    assert dest.read_bytes() == DATA
+    assert f"bytes=0-{quarter - 1}" not in server.gets()
+    assert f"bytes={quarter + 10}-{2 * quarter - 1}" in server.gets()
+
+
+def test_corrupt_partial_restarts_from_zero(http_stub, tmp_path):
+    server, url = http_stub()
+    dest = tmp_path / "artifact.bin"
+    _partial(dest, b"\xff" * 100000)
+    _download_file(url, dest, sha256=hashlib.sha256(DATA).hexdigest(), progress=_quiet)
+    assert dest.read_bytes() == DATA
+    assert server.gets() == ["bytes=100000-", None]
+
+
+def test_complete_partial_is_not_refetched(http_stub, tmp_path):
+    server, url = http_stub()
+    dest = tmp_path / "artifact.bin"
+    _partial(dest, DATA)
+    _download_file(url, dest, sha256=hashlib.sha256(DATA).hexdigest(), progress=_quiet)
+    assert dest.read_bytes() == DATA
+    assert server.gets() == []
+
+
+def test_complete_but_corrupt_partial_restarts(http_stub, tmp_path):
+    server, url = http_stub()
+    dest = tmp_path / "artifact.bin"
+    _partial(dest, b"\x00" * len(DATA))
+    _download_file(url, dest, sha256=hashlib.sha256(DATA).hexdigest(), progress=_quiet)
+    assert dest.read_bytes() == DATA
+    assert server.gets() == [None]
+
+
+def test_oversized_partial_is_discarded(http_stub, tmp_path):
+    server, url = http_stub()
+    dest = tmp_path / "artifact.bin"
+    _partial(dest, DATA + b"trailing garbage")
+    _download_file(url, dest, progress=_quiet)
+    assert dest.read_bytes() == DATA
+    assert server.gets() == [None]
+
+
+def test_range_not_satisfiable_restarts(http_stub, tmp_path):
+    server, url = http_stub(sized=False)
+    dest = tmp_path / "artifact.bin"
+    _partial(dest, DATA, total=None)
+    _download_file(url, dest, progress=_quiet)
+    assert dest.read_bytes() == DATA
+    assert server.gets() == ["bytes=0-0", f"bytes={len(DATA)}-", None]
+
+
+def test_size_mismatch_is_rejected(http_stub, tmp_path):
+    _, url = http_stub()
+    dest = tmp_path / "artifact.bin"
+    with pytest.raises(DownloadError, match="size mismatch"):
+        _download_file(url, dest, expected_size=len(DATA) + 1, progress=_quiet)
+    assert not dest.exists()
+
+
+def test_sha256_mismatch_drops_partial(http_stub, tmp_path):
+    _, url = http_stub()
+    dest = tmp_path / "artifact.bin"
+    with pytest.raises(DownloadError, match="sha256 mismatch"):
+        _download_file(url, dest, sha256="0" * 64, progress=_quiet)
+    assert not dest.exists()
+    assert not dest.with_name(dest.name + ".part").exists()
@@ -0,0 +1,9 @@
+from core.constants import IMPORT_BUDGET_FORBIDDEN, IMPORT_BUDGET_MS
+from core.import_budget import measure
+
+
+def test_startup_imports_within_budget():
+    total, modules = min((measure() for _ in range(3)), key=lambda run: run[0])
+    assert "core.utils" in modules
+    assert [name for name in IMPORT_BUDGET_FORBIDDEN if name in modules] == []
+    assert total <= IMPORT_BUDGET_MS, f"startup imports took {total:.1f} ms"
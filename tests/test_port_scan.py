@@ -0,0 +1,92 @@
+import pytest
+
+from core.port_scan import is_preloader, wait_for_preloader
+from core.usb_backend import SysfsBackend, UsbBackend, UsbDevice
+
+PRELOADER = UsbDevice("0e8d", "2000", "MediaTek PreLoader USB VCOM (Android)", r"USB\VID_0E8D&PID_2000\5&1a2b")
+BROM = UsbDevice("0e8d", "0003", "MediaTek USB Port (COM7)", r"USB\VID_0E8D&PID_0003\5&1a2b")
+ADB = UsbDevice("17ef", "201c", "Lenovo ADB Interface", r"USB\VID_17EF&PID_201C\HA1XYZ")
+HUB = UsbDevice("8087", "0aaa", "USB Root Hub", "")
+
+
+class ScriptedBackend(UsbBackend):
+    name = "scripted"
+    poll_sec = 0.0
+
+    def __init__(self, scans: list[list[UsbDevice]]) -> None:
+        self.scans = list(scans)
+        self.calls = 0
+        self.closed = False
+
+    def scan(self) -> list[UsbDevice]:
+        self.calls += 1
+        return self.scans.pop(0) if self.scans else []
+
+    def _wait_event(self, timeout: float) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+
+def test_is_preloader_by_ids():
+    assert is_preloader(UsbDevice("0e8d", "2000"))
+
+
+def test_is_preloader_by_name():
+    assert is_preloader(BROM)
+    assert is_preloader(UsbDevice("1004", "6000", "LGE PreLoader USB VCOM"))
+
+
+def test_is_preloader_rejects_other_devices():
+    assert not is_preloader(ADB)
+    assert not is_preloader(HUB)
+    assert not is_preloader(UsbDevice("0e8d", "201c", "Android Composite ADB Interface"))
+
+
+def test_wait_for_preloader_returns_first_match():
+    backend = ScriptedBackend([[HUB], [HUB, ADB], [HUB, PRELOADER, BROM]])
+    assert wait_for_preloader(timeout=5, backend=backend) == PRELOADER
+    assert backend.calls == 3
+    assert not backend.closed
+
+
+def test_wait_for_preloader_times_out():
+    backend = ScriptedBackend([[HUB]])
+    assert wait_for_preloader(timeout=0.05, backend=backend) is None
+
+
+def test_backend_requires_scan():
+    with pytest.raises(TypeError):
+        UsbBackend()
+
+
+def _sysfs_device(root, name, vid="", pid="", product=""):
+    path = root / name
+    path.mkdir()
+    for attr, value in (("idVendor", vid), ("idProduct", pid), ("product", product)):
+        if value:
+            (path / attr).write_text(value + "\n")
+
+
+def test_sysfs_scan_reads_device_attributes(tmp_path):
+    _sysfs_device(tmp_path, "usb1", "1d6b", "0002", "xHCI Host Controller")
+    _sysfs_device(tmp_path, "1-2", "0E8D", "2000", "MT65xx Preloader")
+    _sysfs_device(tmp_path, "1-2:1.0")
+    _sysfs_device(tmp_path, "1-1", "17ef", "201c")
+    backend = SysfsBackend(root=tmp_path, uevents=False)
+    assert backend.scan() == [
+        UsbDevice("17ef", "201c", "", "1-1"),
+        UsbDevice("0e8d", "2000", "MT65xx Preloader", "1-2"),
+        UsbDevice("1d6b", "0002", "xHCI Host Controller", "usb1"),
+    ]
+
+
+def test_sysfs_scan_missing_root(tmp_path):
+    assert SysfsBackend(root=tmp_path / "missing", uevents=False).scan() == []
+
+
+def test_wait_for_preloader_on_sysfs(tmp_path):
+    _sysfs_device(tmp_path, "1-2", "0e8d", "2000", "MT65xx Preloader")
+    dev = wait_for_preloader(timeout=1, backend=SysfsBackend(root=tmp_path, uevents=False))
+    assert dev is not None and dev.path == "1-2"
@@ -0,0 +1,103 @@
+import io
+import itertools
+
+from core.spft_output import SpftOutputParser, iter_lines, parse_transcript
+
+MB = 1024 * 1024
+
+# Hand-written lines in the style of the SP Flash Tool V6 console, not a
+# captured log: they pin the parser's classification rules, not the real
+# output format.
+SYNTHETIC_TRANSCRIPT = """\
+Connecting to BROM...
+BROM connected
+Download DA now...
+DA Connected
+Downloading partition [preloader]
+ 50% 1 MB / 2 MB
+100% 2 MB / 2 MB
+Downloading partition [boot_a]
+ 25%
+ 100%
+Format partition userdata
+All command exec done!
+"""
+
+SYNTHETIC_FAILED_TRANSCRIPT = """\
+Connecting to BROM...
+Download DA now...
+ERROR: STATUS_BROM_CMD_SEND_DA_FAIL (0xC0060003)
+"""
+
+
+def _clock(step: float = 2.0):
+    ticks = itertools.count(0.0, step)
+    return lambda: next(ticks)
+
+
+def _kinds(events):
+    return [(e.kind, e.stage, e.partition) for e in events]
+
+
+def test_synthetic_transcript_classification():
+    events = parse_transcript(SYNTHETIC_TRANSCRIPT.splitlines(), sizes={"boot_a": 8 * MB}, clock=_clock())
+    assert _kinds(events) == [
+        ("stage", "connect", ""),
+        ("text", "connect", ""),
+        ("stage", "da", ""),
+        ("text", "da", ""),
+        ("stage", "download", ""),
+        ("progress", "download", "preloader"),
+        ("progress", "download", "preloader"),
+        ("partition_done", "download", "preloader"),
+        ("text", "download", "boot_a"),
+        ("progress", "download", "boot_a"),
+        ("progress", "download", "boot_a"),
+        ("partition_done", "download", "boot_a"),
+        ("stage", "format", ""),
+        ("stage", "done", ""),
+    ]
+
+
+def test_progress_bytes_and_rate():
+    events = parse_transcript(SYNTHETIC_TRANSCRIPT.splitlines(), sizes={"boot_a": 8 * MB}, clock=_clock())
+    first = next(e for e in events if e.kind == "progress")
+    assert first.percent == 50.0
+    assert first.done_bytes == 1 * MB
+    assert first.total_bytes == 2 * MB
+    assert first.rate == MB / 2
+    assert first.eta == 2.0
+
+
+def test_percent_only_uses_scatter_size():
+    events = parse_transcript(SYNTHETIC_TRANSCRIPT.splitlines(), sizes={"boot_a": 8 * MB}, clock=_clock())
+    boot = [e for e in events if e.kind == "progress" and e.partition == "boot_a"]
+    assert boot[0].done_bytes == 2 * MB
+    assert boot[0].total_bytes == 8 * MB
+    done = next(e for e in events if e.kind == "partition_done" and e.partition == "boot_a")
+    assert done.done_bytes == 8 * MB
+
+
+def test_error_line_marks_failure():
+    parser = SpftOutputParser(clock=_clock())
+    events = []
+    for line in SYNTHETIC_FAILED_TRANSCRIPT.splitlines():
+        events.extend(parser.feed(line))
+    assert parser.failed
+    assert events[-1].kind == "error"
+    assert events[-1].stage == "da"
+    assert "SEND_DA_FAIL" in events[-1].text
+
+
+def test_non_partition_words_are_ignored():
+    events = parse_transcript(["Download partition table ok", "Partition info: 12 entries"], clock=_clock())
+    assert all(e.partition == "" for e in events)
+
+
+def test_blank_lines_produce_nothing():
+    assert parse_transcript(["", "   ", "\r"], clock=_clock()) == []
+
+
+def test_iter_lines_splits_carriage_returns():
+    stream = io.BytesIO(b" 10%\r 20%\r 30%\r\nDownload OK\n tail")
+    assert list(iter_lines(stream)) == [" 10%", " 20%", " 30%", "Download OK", " tail"]